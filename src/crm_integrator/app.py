@@ -1,18 +1,25 @@
 # src/crm_integrator/app.py - SCHEMA COMPATIBLE VERSION
 
-import json
-import boto3
+import functools
+import gzip
 import logging
+import orjson
 import os
+import re
 from datetime import datetime
+from types import MappingProxyType
 from typing import Dict, Any, List, Optional
 
+from shared.config import get_aws_client
+from services.tracking_service import TrackingService
+
 # Configuración existente
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
-s3_client = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
+s3_client = get_aws_client('s3')
+dynamodb_client = get_aws_client('dynamodb')
+tracking_service = TrackingService()
 
 # Variables de entorno existentes
 S3_BUCKET_NAME = os.environ['S3_BUCKET_NAME']
@@ -22,8 +29,67 @@ CREATIO_URL = os.environ.get('CREATIO_URL', 'https://11006608-demo.creatio.com')
 CREATIO_USERNAME = os.environ.get('CREATIO_USERNAME', 'Supervisor')
 CREATIO_PASSWORD = os.environ.get('CREATIO_PASSWORD')
 
+# Valores que representan una fecha ausente en los datos OCR
+_NULL_DATE_SENTINELS = frozenset({'No especificado', 'No especificada', '', 'null'})
+
+# Meses en español y formatos numéricos aceptados al parsear fechas para Creatio
+_MESES = MappingProxyType({
+    'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
+    'mayo': '05', 'junio': '06', 'julio': '07', 'agosto': '08',
+    'septiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12'
+})
+_NUMERIC_DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d', '%d/%m/%y', '%d-%m-%y')
+
+# Tipos de oficio que se tratan como alta prioridad / acción urgente
+_URGENT_TIPOS_RE = re.compile(
+    r'secuestro|embargo|aprehensión|allanamiento|citación|levantamiento', re.IGNORECASE
+)
+
+# Expresiones de actualización de tracking precalculadas por estado
+_BASE_STATUS_UPDATE = "SET #status = :status, updated_at = :updated_at"
+_STATUS_UPDATE_EXPRESSIONS = {
+    'completed': _BASE_STATUS_UPDATE + ", completed_at = :updated_at",
+    'crm_error': _BASE_STATUS_UPDATE + ", error_at = :updated_at",
+    'error': _BASE_STATUS_UPDATE + ", error_at = :updated_at"
+}
+_DETAILS_UPDATE_SUFFIX = ", details = :details"
+
+# Campos del caso que existen en el schema real de Creatio: (campo Creatio,
+# campo del payload[, longitud máxima, valor por defecto])
+_CASE_DATE_FIELDS = (
+    ("NdosFechadeEmision", 'IssueDate'),
+    ("NdosFechadeRecibido", 'ReceivedDate'),
+    ("NdosFechadeResolucion", 'ResolutionDate'),
+    ("NdosVencimiento", 'DueDate')
+)
+_CASE_TEXT_FIELDS = (
+    ("NdosNoficio", 'OficioNumber', 50, 'N/A'),
+    ("NdosAutoridad", 'Authority', 200, 'No especificado'),
+    ("NdosClasificaciondeOficio", 'DocumentClassification', 100, 'No especificado'),
+    ("NdosObservaciones", 'Subject', 500, 'Oficio procesado automáticamente'),
+    ("NdosPalabrasClaves", 'KeywordsFound', 300, 'Ninguna'),
+    ("NdosNotas", 'Notes', 500, 'Procesado por OCR automático'),
+    ("NdosInstruccion", 'Instructions', 300, ''),
+    # Campos opcionales de texto
+    ("NdosDelito", 'Crime', 100, ''),
+    ("NdosNdeResolucion", 'ResolutionNumber', 50, ''),
+    ("NdosCarpeta", 'Folder', 50, ''),
+    ("NdosSucursaldeRecibido", 'BranchReceived', 100, '')
+)
+_CASE_BOOL_FIELDS = (
+    ("NdosSensitivo", 'RequiresUrgentAction'),
+    ("NdosDirigidoaGlobalBank", 'DirectedToGlobalBank'),
+    ("NdosSellodeAutoridad", 'HasAuthoritySeal')
+)
+_EMPTY_TEXT_VALUES = frozenset({'', 'null', 'None', 'No especificado'})
+_EMPTY_NUMBER_VALUES = frozenset({'', 'null', 'None'})
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# Id de la entidad creada en la cabecera OData-EntityId (.../Case(<guid>))
+_ODATA_ENTITY_ID_RE = re.compile(r'\(([0-9a-fA-F-]{36})\)\s*$')
+
 # CloudWatch para métricas
-cloudwatch = boto3.client('cloudwatch')
+cloudwatch = get_aws_client('cloudwatch')
 
 def put_crm_metric(metric_name: str, value: float, unit: str = 'Count', dimensions: Dict[str, str] = None):
     """Enviar métrica personalizada a CloudWatch para CRM"""
@@ -51,7 +117,10 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     VERSIÓN COMPATIBLE CON SCHEMA EXISTENTE
     """
     try:
-        logger.info(f"🏢 Schema-compatible CRM Integrator event received: {json.dumps(event, default=str)}")
+        logger.info("🏢 Schema-compatible CRM Integrator event received - Records: %s", len(event.get('Records', [])))
+        # El evento completo solo se serializa si DEBUG está habilitado
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Event: %s", orjson.dumps(event, default=str).decode('utf-8'))
         
         results = []
         for record in event.get('Records', []):
@@ -64,19 +133,19 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'processed_messages': len(results),
                 'results': results,
                 'enhanced_processing': True,
                 'schema_compatible': True
-            })
+            }, default=str).decode('utf-8')
         }
         
     except Exception as e:
         logger.error(f"❌ Error en Schema-compatible CRM integrator: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
+            'body': orjson.dumps({'error': str(e)}).decode('utf-8')
         }
 
 def process_enhanced_sqs_message(record: Dict[str, Any]) -> Dict[str, Any]:
@@ -85,7 +154,7 @@ def process_enhanced_sqs_message(record: Dict[str, Any]) -> Dict[str, Any]:
     USANDO SOLO CAMPOS CONOCIDOS
     """
     try:
-        message_body = json.loads(record['body'])
+        message_body = orjson.loads(record['body'])
         job_id = message_body.get('job_id')
         batch_id = message_body.get('batch_id')
         is_enhanced = message_body.get('enhanced_processing', False)
@@ -101,7 +170,7 @@ def process_enhanced_sqs_message(record: Dict[str, Any]) -> Dict[str, Any]:
             return {'success': False, 'job_id': job_id, 'error': 'No OCR result found'}
         
         # Verificar si tiene datos estructurados
-        has_structured_data = bool(ocr_result.get('structured_data_raw'))
+        has_structured_data = result_has_structured_data(ocr_result)
         has_classification = bool(ocr_result.get('clasificacion'))
         
         logger.info(f"📊 OCR Result Analysis for {job_id}:")
@@ -159,7 +228,11 @@ def get_enhanced_ocr_result_from_s3(job_id: str) -> Optional[Dict[str, Any]]:
             Bucket=S3_BUCKET_NAME,
             Key=f'jobs/{job_id}/result.json'
         )
-        result = json.loads(response['Body'].read())
+        content = response['Body'].read()
+        # El OCR processor guarda los resultados comprimidos (ContentEncoding: gzip)
+        if response.get('ContentEncoding') == 'gzip':
+            content = gzip.decompress(content)
+        result = orjson.loads(content)
         
         logger.info(f"✅ OCR result obtained for {job_id}")
         logger.info(f"📋 Result keys: {list(result.keys())}")
@@ -168,7 +241,7 @@ def get_enhanced_ocr_result_from_s3(job_id: str) -> Optional[Dict[str, Any]]:
         logger.info(f"🔍 Result details:")
         logger.info(f"  - Success: {result.get('success')}")
         logger.info(f"  - Text length: {len(result.get('texto_completo', ''))}")
-        logger.info(f"  - Has structured_data_raw: {bool(result.get('structured_data_raw'))}")
+        logger.info(f"  - Has structured data: {result_has_structured_data(result)}")
         logger.info(f"  - Has clasificacion: {bool(result.get('clasificacion'))}")
         logger.info(f"  - Has informacion_extraida: {bool(result.get('informacion_extraida'))}")
         logger.info(f"  - Enhanced processing: {result.get('enhanced_processing')}")
@@ -188,6 +261,17 @@ def get_enhanced_ocr_result_from_s3(job_id: str) -> Optional[Dict[str, Any]]:
         logger.error(f"❌ Error obteniendo resultado OCR: {str(e)}")
         return None
 
+def result_has_structured_data(result: Dict[str, Any]) -> bool:
+    """
+    Indica si el OCR devolvió datos estructurados. structured_data_raw omite
+    los campos ya copiados al nivel superior y puede quedar vacío, así que
+    manda el flag de ocr_metadata (resultados antiguos: structured_data_raw)
+    """
+    ocr_metadata = result.get('ocr_metadata')
+    if isinstance(ocr_metadata, dict) and 'has_structured_data' in ocr_metadata:
+        return bool(ocr_metadata['has_structured_data'])
+    return bool(result.get('structured_data_raw'))
+
 def validate_ocr_result_structure(result: Dict[str, Any]) -> bool:
     """
     Valida estructura de resultado OCR - VERSIÓN CORREGIDA
@@ -204,7 +288,7 @@ def validate_ocr_result_structure(result: Dict[str, Any]) -> bool:
         
         # Verificar que tiene texto O datos estructurados
         has_text = bool(result.get('texto_completo', '').strip())
-        has_structured_data = bool(result.get('structured_data_raw'))
+        has_structured_data = result_has_structured_data(result)
         has_classification = bool(result.get('clasificacion'))
         has_info_extraida = bool(result.get('informacion_extraida'))
         
@@ -405,15 +489,8 @@ def determine_priority_from_data(info_extraida: Dict[str, Any], ocr_data: Dict[s
                                 clasificacion: Dict[str, Any]) -> str:
     """Determina prioridad usando clasificación"""
     try:
-        tipo_oficio = clasificacion.get('tipo_oficio', '').lower()
-        
         # Tipos de oficio de alta prioridad
-        high_priority_tipos = [
-            'secuestro', 'embargo', 'aprehensión', 'allanamiento', 
-            'citación', 'levantamiento'
-        ]
-        
-        if any(keyword in tipo_oficio for keyword in high_priority_tipos):
+        if _URGENT_TIPOS_RE.search(clasificacion.get('tipo_oficio') or ''):
             return "High"
         
         # Verificar montos altos
@@ -433,94 +510,74 @@ def requires_urgent_action_from_data(info_extraida: Dict[str, Any], ocr_data: Di
                                     clasificacion: Dict[str, Any]) -> bool:
     """Determina si requiere acción urgente"""
     try:
-        tipo_oficio = clasificacion.get('tipo_oficio', '').lower()
-        
-        urgent_tipos = [
-            'secuestro', 'embargo', 'aprehensión', 'allanamiento', 
-            'citación', 'levantamiento'
-        ]
-        
-        return any(keyword in tipo_oficio for keyword in urgent_tipos)
+        return bool(_URGENT_TIPOS_RE.search(clasificacion.get('tipo_oficio') or ''))
         
     except Exception as e:
         logger.error(f"Error checking urgent action: {str(e)}")
         return False
 
+def _safe_string(value: Any, max_length: int = None, default: str = "") -> str:
+    """Texto limpio y acotado para un campo de Creatio"""
+    if value is None:
+        return default
+    
+    clean_value = str(value).strip()
+    if clean_value in _EMPTY_TEXT_VALUES:
+        return default
+    
+    clean_value = clean_value.replace('\x00', '').replace('\r', '').replace('\n', ' ')
+    
+    if max_length and len(clean_value) > max_length:
+        clean_value = clean_value[:max_length-3] + "..."
+    
+    return clean_value
+
+def _safe_date(date_str: str) -> str:
+    """Fecha ISO (YYYY-MM-DD) o la fecha nula de Creatio"""
+    if not date_str or date_str in _NULL_DATE_SENTINELS:
+        return "1900-01-01"
+    
+    if _ISO_DATE_RE.match(str(date_str)):
+        return str(date_str)
+    else:
+        return "1900-01-01"
+
+def _safe_number(value: Any, default: float = 0.0) -> float:
+    """Monto numérico acotado al rango aceptado por Creatio"""
+    try:
+        if value is None or str(value).strip() in _EMPTY_NUMBER_VALUES:
+            return default
+        
+        clean_value = str(value).replace('B/.', '').replace(',', '').strip()
+        number = float(clean_value) if clean_value else default
+        
+        if number < 0:
+            return 0.0
+        if number > 999999999:
+            return 999999999.0
+        
+        return number
+    except:
+        return default
+
 def prepare_known_case_data(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     🔧 PREPARAR DATOS USANDO SOLO CAMPOS CONOCIDOS QUE EXISTEN EN CREATIO
     """
     try:
-        def safe_string(value: Any, max_length: int = None, default: str = "") -> str:
-            if value is None or str(value).strip() in ['', 'null', 'None', 'No especificado']:
-                return default
-            
-            clean_value = str(value).strip()
-            clean_value = clean_value.replace('\x00', '').replace('\r', '').replace('\n', ' ')
-            
-            if max_length and len(clean_value) > max_length:
-                clean_value = clean_value[:max_length-3] + "..."
-            
-            return clean_value
-        
-        def safe_date(date_str: str) -> str:
-            if not date_str or date_str in ['No especificado', 'No especificada', '', 'null', None]:
-                return "1900-01-01"
-            
-            import re
-            if re.match(r'^\d{4}-\d{2}-\d{2}$', str(date_str)):
-                return str(date_str)
-            else:
-                return "1900-01-01"
+        # 🔧 USAR SOLO CAMPOS QUE EXISTEN EN EL SCHEMA REAL DE CREATIO
+        case_data_extra = {}
+        for creatio_field, payload_field in _CASE_DATE_FIELDS:
+            case_data_extra[creatio_field] = _safe_date(payload.get(payload_field, ''))
+        for creatio_field, payload_field, max_length, default in _CASE_TEXT_FIELDS:
+            case_data_extra[creatio_field] = _safe_string(payload.get(payload_field, ''), max_length, default)
         
-        def safe_number(value: Any, default: float = 0.0) -> float:
-            try:
-                if value is None or str(value).strip() in ['', 'null', 'None']:
-                    return default
-                
-                clean_value = str(value).replace('B/.', '').replace(',', '').strip()
-                number = float(clean_value) if clean_value else default
-                
-                if number < 0:
-                    return 0.0
-                if number > 999999999:
-                    return 999999999.0
-                
-                return number
-            except:
-                return default
+        # Campo numérico
+        case_data_extra["NdosMonto"] = _safe_number(payload.get('Amount', 0))
         
-        # 🔧 USAR SOLO CAMPOS QUE EXISTEN EN EL SCHEMA REAL DE CREATIO
-        case_data_extra = {
-            # Campos de fecha que existen
-            "NdosFechadeEmision": safe_date(payload.get('IssueDate', '')),
-            "NdosFechadeRecibido": safe_date(payload.get('ReceivedDate', '')),
-            "NdosFechadeResolucion": safe_date(payload.get('ResolutionDate', '')),
-            "NdosVencimiento": safe_date(payload.get('DueDate', '')),
-            
-            # Campos de texto que existen
-            "NdosNoficio": safe_string(payload.get('OficioNumber', ''), 50, 'N/A'),
-            "NdosAutoridad": safe_string(payload.get('Authority', ''), 200, 'No especificado'),
-            "NdosClasificaciondeOficio": safe_string(payload.get('DocumentClassification', ''), 100, 'No especificado'),
-            "NdosObservaciones": safe_string(payload.get('Subject', ''), 500, 'Oficio procesado automáticamente'),
-            "NdosPalabrasClaves": safe_string(payload.get('KeywordsFound', ''), 300, 'Ninguna'),
-            "NdosNotas": safe_string(payload.get('Notes', ''), 500, 'Procesado por OCR automático'),
-            "NdosInstruccion": safe_string(payload.get('Instructions', ''), 300, ''),
-            
-            # Campos opcionales de texto
-            "NdosDelito": safe_string(payload.get('Crime', ''), 100, ''),
-            "NdosNdeResolucion": safe_string(payload.get('ResolutionNumber', ''), 50, ''),
-            "NdosCarpeta": safe_string(payload.get('Folder', ''), 50, ''),
-            "NdosSucursaldeRecibido": safe_string(payload.get('BranchReceived', ''), 100, ''),
-            
-            # Campo numérico
-            "NdosMonto": safe_number(payload.get('Amount', 0)),
-            
-            # Campos booleanos que existen
-            "NdosSensitivo": bool(payload.get('RequiresUrgentAction', False)),
-            "NdosDirigidoaGlobalBank": bool(payload.get('DirectedToGlobalBank', False)),
-            "NdosSellodeAutoridad": bool(payload.get('HasAuthoritySeal', False))
-        }
+        # Campos booleanos que existen
+        for creatio_field, payload_field in _CASE_BOOL_FIELDS:
+            case_data_extra[creatio_field] = bool(payload.get(payload_field, False))
         
         logger.info(f"📋 Real schema data prepared: {len(case_data_extra)} fields")
         logger.info(f"  - All fields confirmed to exist in Creatio schema")
@@ -691,28 +748,30 @@ def create_schema_compatible_creatio_request(payload: Dict[str, Any], has_struct
 
 def parse_date_for_creatio(date_str: str, nullable: bool = True) -> str:
     """Convierte fecha a formato ISO para Creatio"""
-    if not date_str or date_str in ['No especificado', 'No especificada', '', 'null', None]:
+    # El OCR puede devolver listas o dicts (no hashables): solo se cachean strings
+    if not isinstance(date_str, str):
+        if date_str:
+            logger.warning(f"Fecha con tipo inesperado {type(date_str).__name__}: {date_str}")
+        return "1900-01-01" if not nullable else None
+    return _parse_date_str(date_str, nullable)
+
+@functools.lru_cache(maxsize=512)
+def _parse_date_str(date_str: str, nullable: bool) -> str:
+    """Parseo de fechas string (función pura, cacheada por contenedor)"""
+    if not date_str or date_str in _NULL_DATE_SENTINELS:
         return "1900-01-01" if not nullable else None
     
     try:
-        import re
-        from datetime import datetime
-        
-        date_clean = date_str.strip()
+        date_lower = date_str.strip().lower()
         
-        # Intentar parsear fechas en español
-        if " de " in date_clean.lower():
+        # Intentar parsear fechas en español ("15 de marzo de 2024"); solo se
+        # usan los cinco primeros tokens, así que el split queda acotado
+        if " de " in date_lower:
             try:
-                meses = {
-                    'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
-                    'mayo': '05', 'junio': '06', 'julio': '07', 'agosto': '08',
-                    'septiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12'
-                }
-                
-                parts = date_clean.lower().split()
+                parts = date_lower.split(None, 5)
                 if len(parts) >= 4 and parts[1] == 'de' and parts[3] == 'de':
                     dia = parts[0].zfill(2)
-                    mes = meses.get(parts[2], None)
+                    mes = _MESES.get(parts[2])
                     año = parts[4]
                     
                     if mes and año.isdigit():
@@ -726,9 +785,7 @@ def parse_date_for_creatio(date_str: str, nullable: bool = True) -> str:
         if not date_clean:
             return "1900-01-01" if not nullable else None
         
-        formats = ['%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d', '%d/%m/%y', '%d-%m-%y']
-        
-        for fmt in formats:
+        for fmt in _NUMERIC_DATE_FORMATS:
             try:
                 dt = datetime.strptime(date_clean, fmt)
                 return dt.strftime('%Y-%m-%d')
@@ -744,28 +801,21 @@ def parse_date_for_creatio(date_str: str, nullable: bool = True) -> str:
 def update_tracking_status(batch_id: str, job_id: str, status: str, details: str = ''):
     """Actualiza el estado en DynamoDB"""
     try:
-        table = dynamodb.Table(JOB_TRACKING_TABLE)
-        
-        update_expression = "SET #status = :status, updated_at = :updated_at"
+        # completed_at / error_at comparten el timestamp de updated_at
+        update_expression = _STATUS_UPDATE_EXPRESSIONS.get(status, _BASE_STATUS_UPDATE)
         expression_values = {
-            ':status': status,
-            ':updated_at': datetime.utcnow().isoformat()
+            ':status': {'S': status},
+            ':updated_at': {'S': datetime.utcnow().isoformat()}
         }
         expression_names = {'#status': 'status'}
         
         if details:
-            update_expression += ", details = :details"
-            expression_values[':details'] = details
-        
-        if status == 'completed':
-            update_expression += ", completed_at = :completed_at"
-            expression_values[':completed_at'] = datetime.utcnow().isoformat()
-        elif status in ['crm_error', 'error']:
-            update_expression += ", error_at = :error_at"
-            expression_values[':error_at'] = datetime.utcnow().isoformat()
-        
-        table.update_item(
-            Key={'job_id': job_id},
+            update_expression += _DETAILS_UPDATE_SUFFIX
+            expression_values[':details'] = {'S': details}
+        
+        dynamodb_client.update_item(
+            TableName=JOB_TRACKING_TABLE,
+            Key={'job_id': {'S': job_id}},
             UpdateExpression=update_expression,
             ExpressionAttributeNames=expression_names,
             ExpressionAttributeValues=expression_values
@@ -773,39 +823,15 @@ def update_tracking_status(batch_id: str, job_id: str, status: str, details: str
         
         logger.info(f"✅ Schema-compatible status updated: {job_id} -> {status}")
         
-        # Actualizar progreso del batch
-        try:
-            update_batch_completion_counter(batch_id, status == 'completed')
-        except Exception as batch_error:
-            logger.warning(f"Error updating batch counter: {str(batch_error)}")
+        # Actualizar progreso del batch: los contadores se recalculan desde
+        # los jobs (update_batch_progress es su único dueño, también en el OCR
+        # processor), así que no se incrementan aquí
+        if batch_id:
+            tracking_service.update_batch_progress(batch_id)
         
     except Exception as e:
         logger.error(f"Error updating schema-compatible status: {str(e)}")
 
-def update_batch_completion_counter(batch_id: str, success: bool):
-    """Actualiza contadores de completitud del batch"""
-    try:
-        batch_table = dynamodb.Table(BATCH_TRACKING_TABLE)
-        
-        if success:
-            update_expression = "ADD completed_count :inc SET last_updated = :updated"
-        else:
-            update_expression = "ADD error_count :inc SET last_updated = :updated"
-        
-        batch_table.update_item(
-            Key={'batch_id': batch_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues={
-                ':inc': 1,
-                ':updated': datetime.utcnow().isoformat()
-            }
-        )
-        
-        logger.info(f"✅ Schema-compatible batch counter updated: {batch_id}")
-        
-    except Exception as e:
-        logger.warning(f"Error updating schema-compatible batch counter: {str(e)}")
-
 # Servicio de Creatio (mantener implementación original)
 class CreatioService:
     """Servicio de Creatio compatible con schema existente"""
@@ -815,6 +841,7 @@ class CreatioService:
         self.password = password
         self.bpmcsrf = None
         self.cookie_jar = None
+        self._headers = None
     
     def authenticate(self):
         """Autentica con Creatio"""
@@ -823,13 +850,14 @@ class CreatioService:
         
         auth_url = f"{self.url}/ServiceModel/AuthService.svc/Login"
         self.cookie_jar = http.cookiejar.CookieJar()
+        self._headers = None
         cookie_handler = urllib.request.HTTPCookieProcessor(self.cookie_jar)
         opener = urllib.request.build_opener(cookie_handler)
 
-        data = json.dumps({
+        data = orjson.dumps({
             "UserName": self.username, 
             "UserPassword": self.password
-        }).encode("utf-8")
+        })
         
         request = urllib.request.Request(auth_url, data=data, headers={"Content-Type": "application/json"})
         response = opener.open(request)
@@ -845,27 +873,47 @@ class CreatioService:
             raise Exception("Error de autenticación: " + response.read().decode("utf-8"))
     
     def _get_headers(self):
-        """Prepara headers para peticiones"""
-        cookie_header = "; ".join([f"{cookie.name}={cookie.value}" for cookie in self.cookie_jar])
-        return {
-            "Content-Type": "application/json",
-            "BPMCSRF": self.bpmcsrf,
-            "Cookie": cookie_header
-        }
+        """Prepara headers para peticiones (se arman una vez por sesión autenticada)"""
+        if self._headers is None:
+            cookie_header = "; ".join(f"{cookie.name}={cookie.value}" for cookie in self.cookie_jar)
+            self._headers = {
+                "Content-Type": "application/json",
+                # Solo se necesita el Id de lo creado: Creatio responde 204 con
+                # OData-EntityId en vez de serializar la entidad completa
+                "Prefer": "return=minimal",
+                "BPMCSRF": self.bpmcsrf,
+                "Cookie": cookie_header
+            }
+        return self._headers
+    
+    def _created_entity_id(self, response):
+        """Obtiene el Id de la entidad creada (204 con cabecera o 201 con cuerpo)"""
+        if response.status == 204:
+            entity_id = response.headers.get("OData-EntityId") or response.headers.get("Location") or ""
+            match = _ODATA_ENTITY_ID_RE.search(entity_id)
+            created_id = match.group(1) if match else None
+        else:
+            created_id = orjson.loads(response.read()).get("Id")
+        
+        # Sin Id no se pueden enlazar las personas al caso: mejor fallar aquí
+        if not created_id:
+            raise Exception(f"Creatio no devolvió el Id de la entidad creada (status {response.status})")
+        return created_id
     
     def create_case(self, subject, notes, priority_id="d9bd322c-f46b-1410-ee8c-0050ba5d6c38", case_data_extra=None):
         """Crea caso en Creatio usando schema compatible"""
         import urllib.request
         
         url = f"{self.url}/0/odata/case"
+        now_iso = datetime.utcnow().isoformat() + "Z"
         
         case_data = {
-            "CreatedOn": datetime.utcnow().isoformat() + "Z",
+            "CreatedOn": now_iso,
             "CreatedById": "410006e1-ca4e-4502-a9ec-e54d922d2c00",
-            "ModifiedOn": datetime.utcnow().isoformat() + "Z",
+            "ModifiedOn": now_iso,
             "ModifiedById": "410006e1-ca4e-4502-a9ec-e54d922d2c00",
             "ProcessListeners": 2,
-            "RegisteredOn": datetime.utcnow().isoformat() + "Z",
+            "RegisteredOn": now_iso,
             "Subject": "Caso, tipo Oficio",
             "Symptoms": "Caso, tipo Oficio",
             "StatusId": "ae5f2f10-f46b-1410-fd9a-0050ba5d6c38",
@@ -885,15 +933,14 @@ class CreatioService:
             case_data.update(case_data_extra)
         
         try:
-            data = json.dumps(case_data).encode("utf-8")
+            data = orjson.dumps(case_data)
             request = urllib.request.Request(url, data=data, headers=self._get_headers())
             request.get_method = lambda: 'POST'
             
             response = urllib.request.urlopen(request)
             
-            if response.status == 201:
-                created_case = json.loads(response.read().decode("utf-8"))
-                case_id = created_case.get("Id")
+            if response.status in (201, 204):
+                case_id = self._created_entity_id(response)
                 logger.info(f"🎉 Schema-compatible case created: {case_id}")
                 return case_id
             else:
@@ -907,17 +954,21 @@ class CreatioService:
         """Crea registro de persona usando schema real de NdosPersonasOCR"""
         import urllib.request
         
+        if not case_id:
+            raise ValueError("case_id es obligatorio para crear personas")
+        
         url = f"{self.url}/0/odata/NdosPersonasOCR"
         
         # Extraer datos de la persona
         nombre_completo = person_data.get('nombre_completo', '')
         nombres = nombre_completo.split() if nombre_completo else []
+        now_iso = datetime.utcnow().isoformat() + "Z"
         
         # Mapear a los campos reales del schema de NdosPersonasOCR (basado en el objeto real)
         persona_record = {
-            "CreatedOn": datetime.utcnow().isoformat() + "Z",
+            "CreatedOn": now_iso,
             "CreatedById": "410006e1-ca4e-4502-a9ec-e54d922d2c00",
-            "ModifiedOn": datetime.utcnow().isoformat() + "Z",
+            "ModifiedOn": now_iso,
             "ModifiedById": "410006e1-ca4e-4502-a9ec-e54d922d2c00",
             "ProcessListeners": 0,
             
@@ -937,15 +988,14 @@ class CreatioService:
         }
         
         try:
-            data = json.dumps(persona_record).encode("utf-8")
+            data = orjson.dumps(persona_record)
             request = urllib.request.Request(url, data=data, headers=self._get_headers())
             request.get_method = lambda: 'POST'
             
             response = urllib.request.urlopen(request)
             
-            if response.status == 201:
-                created_person = json.loads(response.read().decode("utf-8"))
-                person_id = created_person.get("Id")
+            if response.status in (201, 204):
+                person_id = self._created_entity_id(response)
                 logger.info(f"✅ Schema-compatible person record created: {person_id}")
                 return person_id
             else:
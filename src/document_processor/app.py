@@ -1,7 +1,7 @@
 # src/document_processor/app.py
-import json
 import boto3
 import logging
+import orjson
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
@@ -40,7 +40,10 @@ def lambda_handler(event, context) -> Dict[str, Any]:
     Simplified and focused on single responsibility
     """
     try:
-        logger.info(f"🚀 Starting document processing - Event: {json.dumps(event, default=str)}")
+        logger.info("🚀 Starting document processing - Records: %s", len(event.get('Records', [])))
+        # The full event is only serialized when DEBUG is emitted
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Event: %s", orjson.dumps(event, default=str).decode('utf-8'))
         
         # Extract S3 event information
         s3_events = extract_s3_events(event)
@@ -57,7 +60,7 @@ def lambda_handler(event, context) -> Dict[str, Any]:
         return create_success_response(results)
         
     except Exception as e:
-        logger.error(f"❌ Fatal error in lambda_handler: {str(e)}")
+        logger.error("❌ Fatal error in lambda_handler: %s", e)
         return create_error_response(f"Processing failed: {str(e)}")
 
 def extract_s3_events(event: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -76,11 +79,11 @@ def extract_s3_events(event: Dict[str, Any]) -> List[Dict[str, Any]]:
                 }
                 s3_events.append(s3_info)
         
-        logger.info(f"📄 Extracted {len(s3_events)} S3 events")
+        logger.info("📄 Extracted %s S3 events", len(s3_events))
         return s3_events
         
     except Exception as e:
-        logger.error(f"❌ Error extracting S3 events: {str(e)}")
+        logger.error("❌ Error extracting S3 events: %s", e)
         return []
 
 def process_single_document(s3_event: Dict[str, Any], context) -> ProcessingResult:
@@ -92,20 +95,27 @@ def process_single_document(s3_event: Dict[str, Any], context) -> ProcessingResu
     key = s3_event['key']
     
     try:
-        logger.info(f"📄 Processing document: s3://{bucket}/{key}")
+        logger.info("📄 Processing document: s3://%s/%s", bucket, key)
         
         # Step 1: Download and validate PDF
         pdf_content = pdf_service.download_from_s3(bucket, key)
         PDFValidator.validate_pdf_content(pdf_content)
         
+        # Parse the PDF and extract page texts once; both are shared by
+        # metadata extraction and splitting
+        pdf_reader = pdf_service.open_pdf(pdf_content)
+        page_texts = pdf_service.extract_page_texts(pdf_content, pdf_reader)
+        
         # Step 2: Extract metadata from first page
-        metadata = metadata_service.extract_from_pdf_first_page(pdf_content)
+        metadata = metadata_service.extract_from_pdf_first_page(
+            pdf_content, pdf_reader, page_texts[0] if page_texts else None
+        )
         
         # Step 3: Create batch tracking
         batch_id = batch_service.create_batch(metadata, source='s3_direct')
         
         # Step 4: Split PDF into individual oficios
-        oficios = pdf_service.split_into_oficios(pdf_content, batch_id, metadata)
+        oficios = pdf_service.split_into_oficios(pdf_content, batch_id, metadata, pdf_reader, page_texts)
         
         # Step 5: Validate oficios count
         validation_result = validate_oficios_count(oficios, metadata)
@@ -116,6 +126,9 @@ def process_single_document(s3_event: Dict[str, Any], context) -> ProcessingResu
         # Step 6: Store oficios in S3
         stored_oficios = pdf_service.store_oficios_in_s3(oficios, batch_id)
         
+        # Register job tracking rows before the OCR workers start updating them
+        batch_service.register_oficios(batch_id, stored_oficios)
+        
         # Step 7: Send to processing queue
         queue_result = queue_service.send_oficios_to_processing(stored_oficios, batch_id, metadata)
         
@@ -123,7 +136,7 @@ def process_single_document(s3_event: Dict[str, Any], context) -> ProcessingResu
         batch_service.update_status(batch_id, 'queued_for_processing', 
                                   f"{len(oficios)} oficios enviados a procesamiento")
         
-        logger.info(f"✅ Document processed successfully: {len(oficios)} oficios created")
+        logger.info("✅ Document processed successfully: %s oficios created", len(oficios))
         
         return ProcessingResult(
             success=True,
@@ -133,15 +146,15 @@ def process_single_document(s3_event: Dict[str, Any], context) -> ProcessingResu
         )
         
     except PDFProcessingError as e:
-        logger.error(f"📄 PDF processing error: {str(e)}")
+        logger.error("📄 PDF processing error: %s", e)
         return ProcessingResult(False, "", 0, {}, f"PDF error: {str(e)}")
         
     except ValidationError as e:
-        logger.error(f"✅ Validation error: {str(e)}")
+        logger.error("✅ Validation error: %s", e)
         return ProcessingResult(False, "", 0, {}, f"Validation error: {str(e)}")
         
     except Exception as e:
-        logger.error(f"❌ Unexpected error processing document: {str(e)}")
+        logger.error("❌ Unexpected error processing document: %s", e)
         return ProcessingResult(False, "", 0, {}, f"Processing error: {str(e)}")
 
 def validate_oficios_count(oficios: List[Dict], metadata: Dict[str, Any]) -> 'ValidationResult':
@@ -157,7 +170,7 @@ def create_success_response(results: List[ProcessingResult]) -> Dict[str, Any]:
     
     return {
         'statusCode': 200,
-        'body': json.dumps({
+        'body': orjson.dumps({
             'status': 'success',
             'processed_documents': len(results),
             'successful_batches': len(successful_batches),
@@ -166,16 +179,16 @@ def create_success_response(results: List[ProcessingResult]) -> Dict[str, Any]:
             'batch_ids': successful_batches,
             'errors': [{'batch': r.batch_id, 'error': r.error} for r in failed_batches],
             'timestamp': datetime.utcnow().isoformat()
-        }, ensure_ascii=False)
+        }).decode('utf-8')
     }
 
 def create_error_response(error_message: str) -> Dict[str, Any]:
     """Create standardized error response"""
     return {
         'statusCode': 400,
-        'body': json.dumps({
+        'body': orjson.dumps({
             'status': 'error',
             'error': error_message,
             'timestamp': datetime.utcnow().isoformat()
-        }, ensure_ascii=False)
+        }).decode('utf-8')
     }
\ No newline at end of file
@@ -1,16 +1,19 @@
 # src/ocr_processor/app.py - VERSIÓN INTEGRADA MEJORADA
 
-import json
-import boto3
+import hashlib
 import logging
+import orjson
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 # Importar servicios mejorados
 from services.ocr_service import OCRService, OCRResult  # Original OCR service
 from services.storage_service import StorageService
 from services.tracking_service import TrackingService
-from shared.config import Config
+from shared.config import Config, get_aws_client
 from shared.exceptions import OCRBaseException
 from shared.utils import ResponseFormatter, Logger
 from services.post_ocr_validator import PostOCRValidator
@@ -22,94 +25,294 @@ config = Config()
 # Inicializar servicios
 logger.info("📄 Using Enhanced OCR (Mistral AI)")
 ocr_service = OCRService()  # Use enhanced Mistral OCR service
+ocr_service.warmup()  # Open the Mistral TLS connection during init
 
 storage_service = StorageService()
 tracking_service = TrackingService()
+post_ocr_validator = PostOCRValidator()  # Stateless; shared across jobs
 
-# CloudWatch para métricas
-cloudwatch = boto3.client('cloudwatch')
-sqs_client = boto3.client('sqs')
+# Los clientes de CloudWatch (métricas) y SQS (cola CRM) se crean en su
+# primer uso con get_aws_client, fuera del init en frío
+
+# SendMessageBatch accepts at most 10 entries per call
+CRM_SQS_BATCH_SIZE = 10
+CRM_SEND_MAX_ATTEMPTS = 3
+
+# Records are I/O bound (S3, Mistral, DynamoDB), so they run on threads;
+# matches the BatchSize of the OCR queue event source in template.yaml.
+# The pool lives for the container so warm invocations reuse its threads
+OCR_MAX_RECORD_WORKERS = 5
+_record_executor = ThreadPoolExecutor(max_workers=OCR_MAX_RECORD_WORKERS)
+
+# Off-critical-path writes (batch progress, metrics). The executor outlives
+# invocations; lambda_handler waits for pending work before returning because
+# the container is frozen as soon as it does
+_background_executor = ThreadPoolExecutor(max_workers=4)
+_background_futures = []
+BACKGROUND_WAIT_SECONDS = 5
+
+# Timestamp taken once per invocation by lambda_handler, before any worker
+# thread starts, and shared by the metrics of all its records (job results
+# carry their own completion time)
+_invocation_now = datetime.utcnow()
+
+# Stage every job passes through before its final status
+OCR_START_STAGE = ('ocr_processing', 'Starting enhanced OCR extraction')
+
+# Patrones de extract_basic_info_from_text, compilados una vez por contenedor.
+# Las autoridades se prueban en este orden de prioridad
+_OFICIO_RE = re.compile(r'(?:oficio|no\.?)\s*:?\s*([A-Za-z0-9\-]+)', re.IGNORECASE)
+_AUTORIDAD_RES = (
+    re.compile(r'(juzgado [^\.]+)', re.IGNORECASE),
+    re.compile(r'(tribunal [^\.]+)', re.IGNORECASE),
+    re.compile(r'(ministerio [^\.]+)', re.IGNORECASE),
+)
+_FECHA_RE = re.compile(r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})')
+
+# Símbolo de moneda, separadores de miles y espacios de un monto ('B/. 1,234.50')
+_MONTO_STRIP_RE = re.compile(r'B/\.|,|\s')
+
+# Métricas acumuladas durante la invocación; flush_metrics las envía en background
+# (PutMetricData acepta hasta 1000 entradas por llamada)
+METRICS_NAMESPACE = 'OCR/Processing'
+CLOUDWATCH_MAX_METRIC_DATA = 1000
+_metric_buffer = []
 
 def put_custom_metric(metric_name: str, value: float, unit: str = 'Count', 
                      dimensions: Dict[str, str] = None):
-    """Enviar métrica personalizada a CloudWatch"""
-    try:
-        metric_data = {
-            'MetricName': metric_name,
-            'Value': value,
-            'Unit': unit,
-            'Timestamp': datetime.utcnow()
-        }
-        
-        if dimensions:
-            metric_data['Dimensions'] = [{'Name': k, 'Value': v} for k, v in dimensions.items()]
-        
-        cloudwatch.put_metric_data(
-            Namespace='OCR/Processing',
-            MetricData=[metric_data]
+    """Encolar métrica personalizada para CloudWatch"""
+    metric_data = {
+        'MetricName': metric_name,
+        'Value': value,
+        'Unit': unit,
+        'Timestamp': _invocation_now
+    }
+    
+    if dimensions:
+        metric_data['Dimensions'] = [{'Name': k, 'Value': v} for k, v in dimensions.items()]
+    
+    _metric_buffer.append(metric_data)
+
+def flush_metrics() -> None:
+    """Enviar en background las métricas encoladas en esta invocación"""
+    if not _metric_buffer:
+        return
+    pending = _metric_buffer[:]
+    del _metric_buffer[:len(pending)]
+    submit_background(_put_metric_chunks, pending)
+
+def _put_metric_chunks(pending: List[Dict[str, Any]]) -> None:
+    for start in range(0, len(pending), CLOUDWATCH_MAX_METRIC_DATA):
+        chunk = pending[start:start + CLOUDWATCH_MAX_METRIC_DATA]
+        try:
+            get_aws_client('cloudwatch').put_metric_data(Namespace=METRICS_NAMESPACE, MetricData=chunk)
+        except Exception as e:
+            logger.warning(f"Failed to send {len(chunk)} metrics: {str(e)}")
+
+def submit_background(fn, *args) -> None:
+    """Run a write that nobody waits on in the background pool"""
+    _background_futures.append(_background_executor.submit(fn, *args))
+
+def drain_background(context) -> None:
+    """Wait (bounded) for the background writes of this invocation"""
+    if not _background_futures:
+        return
+    pending = _background_futures[:]
+    del _background_futures[:len(pending)]
+    # Never wait past the invocation deadline; keep half a second to return
+    remaining_seconds = context.get_remaining_time_in_millis() / 1000 - 0.5
+    timeout = max(0, min(BACKGROUND_WAIT_SECONDS, remaining_seconds))
+    done, not_done = wait(pending, timeout=timeout)
+    for future in done:
+        if future.exception():
+            logger.warning("Background update failed: %s", future.exception())
+    if not_done:
+        logger.warning("%s background updates still pending", len(not_done))
+
+def ensure_time(context, needed_seconds: float, step: str) -> None:
+    """Fail fast when the invocation cannot finish the next step in time"""
+    remaining_time = context.get_remaining_time_in_millis() / 1000
+    if remaining_time < needed_seconds:
+        raise OCRBaseException(
+            f"Insufficient time remaining at {step}: {remaining_time:.1f}s < {needed_seconds}s"
         )
-    except Exception as e:
-        logger.warning(f"Failed to send metric {metric_name}: {str(e)}")
+
+def finish_job(job_id: str, status: str, message: str) -> None:
+    """Write a job's final status and the stages it went through in one update"""
+    tracking_service.update_job_status(job_id, status, message,
+                                       history=[OCR_START_STAGE, (status, message)])
+
+def extract_with_cache(fingerprint: Optional[str], job_id: str, extract) -> OCRResult:
+    """
+    Run extract() unless the OCR output of the same PDF is already cached.
+    
+    Only the raw OCR output is cached, under the OCR model and annotation
+    schema version; validation and formatting still run per job so the
+    result carries this job's id and timestamps.
+    """
+    if not (config.OCR_RESULT_CACHE_ENABLED and fingerprint):
+        return extract()
+    
+    cached = storage_service.get_cached_ocr(ocr_service.cache_version, fingerprint)
+    if cached:
+        logger.info("♻️ OCR cache hit for job %s (%s)", job_id, fingerprint)
+        return OCRResult(
+            success=True,
+            text=cached.get('text', ''),
+            structured_data=cached.get('structured_data'),
+            metadata={**(cached.get('metadata') or {}), 'job_id': job_id, 'ocr_cache_hit': True},
+            confidence=cached.get('confidence', 'medium'),
+            processing_time=cached.get('processing_time', 0.0)
+        )
+    
+    ocr_result = extract()
+    if ocr_result.success:
+        # Serialized now: the validator mutates structured_data afterwards
+        body = orjson.dumps({
+            'text': ocr_result.text,
+            'structured_data': ocr_result.structured_data,
+            'metadata': ocr_result.metadata,
+            'confidence': ocr_result.confidence,
+            'processing_time': ocr_result.processing_time
+        }, default=str)
+        submit_background(storage_service.put_cached_ocr, ocr_service.cache_version, fingerprint, body)
+    return ocr_result
 
 def lambda_handler(event, context) -> Dict[str, Any]:
     """
     Main Lambda handler for enhanced OCR processing
+    
+    Uses the SQS partial batch response: only the records listed in
+    batchItemFailures are redriven, so succeeded OCR jobs are not re-run.
     """
+    global _invocation_now
+    _invocation_now = datetime.utcnow()
+    
+    records = event.get('Records', [])
+    
     try:
-        logger.info(f"🚀 Enhanced OCR processing started - Records: {len(event.get('Records', []))}")
+        logger.info("🚀 Enhanced OCR processing started - Records: %s", len(records))
         
-        # Process SQS messages
-        results = []
-        for record in event.get('Records', []):
-            result = process_sqs_message(record, context)
-            results.append(result)
-        
-        # Return summary
-        successful = len([r for r in results if r.get('success', False)])
+        # Process SQS messages; results keep the order of the records
+        if len(records) > 1:
+            results = list(_record_executor.map(lambda record: process_sqs_message(record, context), records))
+        else:
+            results = [process_sqs_message(record, context) for record in records]
+        
+        # One pass over the results: tally successes, collect CRM entries
+        # and the failed message ids to hand back to SQS
+        successful = 0
+        crm_entries = []
+        crm_message_ids = []
+        batch_item_failures = []
+        for record, result in zip(records, results):
+            if result.get('success', False):
+                successful += 1
+            elif result.get('retryable', True):
+                batch_item_failures.append({'itemIdentifier': record['messageId']})
+            if 'crm_entry' in result:
+                crm_entries.append(result.pop('crm_entry'))
+                crm_message_ids.append(record['messageId'])
         total = len(results)
+        failed = total - successful
         
+        # Batch metrics go out in the background while the CRM sends run
+        put_custom_metric('BatchProcessed', total)
+        put_custom_metric('BatchSuccessful', successful)
+        put_custom_metric('BatchFailed', failed)
+        flush_metrics()
+        
+        # Hand off every CRM message from this invocation in batched sends
+        # Jobs whose CRM message could not be queued are redriven as a whole
+        if crm_entries:
+            for index in send_crm_entries(crm_entries):
+                batch_item_failures.append({'itemIdentifier': crm_message_ids[index]})
+        
+        drain_background(context)
+        
+        # Return summary
         Logger.log_success(logger, f"Enhanced OCR processing completed", {
             'successful': successful,
             'total': total,
             'success_rate': f"{successful/total*100:.1f}%" if total > 0 else "0%"
         })
         
-        # Send batch metrics
-        put_custom_metric('BatchProcessed', total)
-        put_custom_metric('BatchSuccessful', successful)
-        put_custom_metric('BatchFailed', total - successful)
-        
-        return ResponseFormatter.success_response({
+        response = ResponseFormatter.success_response({
             'processed': total,
             'successful': successful,
-            'failed': total - successful,
+            'failed': failed,
             'results': results,
             'enhanced_processing': True
         })
+        response['batchItemFailures'] = batch_item_failures
+        return response
         
     except Exception as e:
         Logger.log_error(logger, f"Fatal error in enhanced OCR processor", {'error': str(e)})
-        return ResponseFormatter.error_response(f"Enhanced OCR processing failed: {str(e)}", 500)
+        flush_metrics()
+        drain_background(context)
+        response = ResponseFormatter.error_response(f"Enhanced OCR processing failed: {str(e)}", 500)
+        # An empty list would acknowledge the whole batch; redrive all of it
+        response['batchItemFailures'] = [{'itemIdentifier': record['messageId']} for record in records]
+        return response
+
+def _validate_message_body(message_body: Any) -> None:
+    """Reject malformed messages before any DynamoDB, S3 or CloudWatch call"""
+    if not isinstance(message_body, dict):
+        raise ValueError("Message body is not a JSON object")
+    if not message_body.get('job_id'):
+        raise ValueError("Missing job_id")
+    if 'oficio_data' in message_body:
+        oficio_data = message_body['oficio_data']
+        if not isinstance(oficio_data, dict) or not oficio_data.get('s3_key'):
+            raise ValueError("oficio_data without s3_key")
+        if not message_body.get('batch_id'):
+            raise ValueError("Missing batch_id for batch oficio")
 
 def process_sqs_message(record: Dict[str, Any], context) -> Dict[str, Any]:
     """Process individual SQS message with enhanced OCR"""
-    job_id = 'unknown'
-    
+    # Parse the message once; a malformed body would fail again on every
+    # redrive, so it is acknowledged and its job (if any) marked as failed
+    message_body = None
     try:
-        # Parse message
-        message_body = json.loads(record['body'])
-        job_id = message_body.get('job_id')
+        message_body = orjson.loads(record['body'])
+        _validate_message_body(message_body)
+        job_id = message_body['job_id']
         batch_id = message_body.get('batch_id')
         source = message_body.get('source', 'unknown')
+    except Exception as e:
+        Logger.log_error(logger, f"Invalid enhanced SQS message body", {
+            'message_id': record.get('messageId'),
+            'error': str(e)
+        })
+        job_id = message_body.get('job_id') if isinstance(message_body, dict) else None
+        if job_id and isinstance(job_id, str):
+            try:
+                finish_job(job_id, 'error', f'Invalid message body: {str(e)}')
+            except Exception as tracking_error:
+                logger.warning("Could not mark job %s as failed: %s", job_id, tracking_error)
+        return {
+            'success': False,
+            'retryable': False,
+            'job_id': job_id or 'unknown',
+            'error': f'Invalid message body: {str(e)}',
+            'enhanced_processing': True
+        }
+    
+    try:
+        # Need at least 2 minutes before touching S3 or DynamoDB
+        ensure_time(context, 120, 'start')
         
-        Logger.log_processing_step(logger, f"Processing enhanced job {job_id}", {
+        # Single INFO line per job at start; intermediate steps log at DEBUG
+        Logger.log_processing_step(logger, "Processing enhanced job", {
+            'job_id': job_id,
             'batch_id': batch_id,
             'source': source
         })
         
-        # Update status to processing
-        tracking_service.update_job_status(job_id, 'ocr_processing', 
-                                         'Starting enhanced OCR extraction')
+        # Update status to processing (otherwise recorded with the final status)
+        if config.VERBOSE_TRACKING:
+            tracking_service.update_job_status(job_id, *OCR_START_STAGE)
         
         # Process according to source type
         if 'oficio_data' in message_body:
@@ -118,17 +321,16 @@ def process_sqs_message(record: Dict[str, Any], context) -> Dict[str, Any]:
             return process_individual_job_enhanced(job_id, context)
             
     except Exception as e:
-        try:
-            tracking_service.update_job_status(job_id, 'error', f'Enhanced processing error: {str(e)}')
-        except:
-            pass
+        finish_job(job_id, 'error', f'Enhanced processing error: {str(e)}')
         
         Logger.log_error(logger, f"Error processing enhanced SQS message", {
             'job_id': job_id,
             'error': str(e)
         })
         
-        put_custom_metric('ProcessingError', 1, dimensions={'JobId': job_id})
+        put_custom_metric('ProcessingError', 1, dimensions={
+            'ProcessingMode': 'batch_oficio' if 'oficio_data' in message_body else 'individual'
+        })
         
         return {
             'success': False,
@@ -145,35 +347,51 @@ def process_batch_oficio_enhanced(message_data: Dict[str, Any], context) -> Dict
     batch_id = message_data['batch_id']
     
     try:
-        Logger.log_processing_step(logger, f"Processing enhanced batch oficio", {
+        Logger.log_processing_step(logger, "Processing enhanced batch oficio", {
             'job_id': job_id,
             'batch_id': batch_id
-        })
+        }, level=logging.DEBUG)
         
-        # Check remaining execution time
-        remaining_time = context.get_remaining_time_in_millis() / 1000
-        if remaining_time < 120:  # Need at least 2 minutes
-            raise OCRBaseException(f"Insufficient time remaining: {remaining_time:.1f}s")
-        
-        # Step 1: Download PDF from S3
         oficio_data = message_data['oficio_data']
-        pdf_content = storage_service.download_oficio_pdf(oficio_data)
-        
-        logger.info(f"📥 Downloaded PDF: {len(pdf_content)} bytes")
         
-        # Step 2: Enhanced OCR extraction
-        ocr_result = ocr_service.extract_text_from_pdf(
-            pdf_content, 
-            job_id=job_id, 
-            document_type='legal_document'
-        )
+        if config.OCR_DOCUMENT_SOURCE == 'presigned_url':
+            # Steps 1-2: Mistral fetches the PDF from S3 itself, so it is never
+            # buffered, base64-encoded or re-uploaded by this function
+            ensure_time(context, 60, 'ocr')
+            etag = storage_service.get_oficio_pdf_etag(oficio_data) if config.OCR_RESULT_CACHE_ENABLED else None
+            ocr_result = extract_with_cache(
+                f"etag-{etag}" if etag else None,
+                job_id,
+                lambda: ocr_service.extract_text_from_url(
+                    storage_service.presign_oficio_pdf(oficio_data),
+                    job_id=job_id,
+                    document_type='legal_document'
+                )
+            )
+        else:
+            # Step 1: Download PDF from S3
+            ensure_time(context, 90, 'pdf_download')
+            pdf_content, pdf_sha256 = storage_service.download_oficio_pdf_with_digest(oficio_data)
+            
+            logger.debug("📥 Downloaded PDF: %s bytes", len(pdf_content))
+            
+            # Step 2: Enhanced OCR extraction
+            ensure_time(context, 60, 'ocr')
+            ocr_result = extract_with_cache(
+                pdf_sha256,
+                job_id,
+                lambda: ocr_service.extract_text_from_pdf(
+                    pdf_content, 
+                    job_id=job_id, 
+                    document_type='legal_document'
+                )
+            )
         
         if not ocr_result.success:
             raise OCRBaseException(f"Enhanced OCR failed: {ocr_result.error}")
         
         # Step 2.5: Post-OCR validation and enrichment
-        validator = PostOCRValidator()
-        ocr_result_enriched = validator.enrich_ocr_result(ocr_result)
+        ocr_result_enriched = post_ocr_validator.enrich_ocr_result(ocr_result)
         
         # Step 3: Format and validate results
         formatted_result = format_enhanced_result(ocr_result_enriched, message_data)
@@ -181,22 +399,27 @@ def process_batch_oficio_enhanced(message_data: Dict[str, Any], context) -> Dict
         # Step 4: Store enhanced results
         storage_service.save_ocr_result(job_id, formatted_result)
         
-        # Step 5: Update tracking with detailed info
-        tracking_service.update_job_status(
-            job_id, 
-            'ocr_completed', 
-            f'Enhanced OCR completed - Confidence: {ocr_result.confidence}'
-        )
-        
-        # Step 6: Update batch progress
-        tracking_service.update_batch_progress(batch_id)
-        
-        # Step 7: Send to CRM queue if configured
+        # Step 5: Queue the CRM hand-off if configured; lambda_handler sends
+        # the entries of all records together with SendMessageBatch
+        crm_entry = None
         if config.CRM_QUEUE_URL:
-            send_to_crm_queue_enhanced(job_id, batch_id, message_data, formatted_result)
-            Logger.log_processing_step(logger, f"Sent enhanced data to CRM queue", {'job_id': job_id})
+            crm_entry = build_crm_entry(job_id, batch_id, message_data, formatted_result)
+            Logger.log_processing_step(logger, "Queued enhanced data for CRM", {'job_id': job_id},
+                                       level=logging.DEBUG)
+        
+        # Step 6: Write the job's final status once (the CRM integrator takes
+        # it from ocr_completed to completed when a CRM queue is configured)
+        if crm_entry:
+            finish_job(
+                job_id, 
+                'ocr_completed', 
+                f'Enhanced OCR completed - Confidence: {ocr_result.confidence}'
+            )
         else:
-            tracking_service.update_job_status(job_id, 'completed', 'Enhanced processing completed')
+            finish_job(job_id, 'completed', 'Enhanced processing completed')
+        
+        # Step 7: Update batch progress (its result is not needed here)
+        submit_background(tracking_service.update_batch_progress, batch_id)
         
         # Detailed logging and metrics
         processing_stats = calculate_processing_stats(ocr_result, formatted_result)
@@ -207,23 +430,26 @@ def process_batch_oficio_enhanced(message_data: Dict[str, Any], context) -> Dict
         })
         
         # Send detailed metrics
-        send_processing_metrics(processing_stats, job_id)
+        send_processing_metrics(processing_stats, 'batch_oficio')
         
-        return {
+        result = {
             'success': True,
             'job_id': job_id,
             'batch_id': batch_id,
             'enhanced_processing': True,
             'result': processing_stats
         }
+        if crm_entry:
+            result['crm_entry'] = crm_entry
+        return result
         
     except OCRBaseException as e:
         Logger.log_error(logger, f"Enhanced OCR processing error", {
             'job_id': job_id,
             'error': str(e)
         })
-        tracking_service.update_job_status(job_id, 'error', f'Enhanced OCR error: {str(e)}')
-        put_custom_metric('OCRError', 1, dimensions={'JobId': job_id})
+        finish_job(job_id, 'error', f'Enhanced OCR error: {str(e)}')
+        put_custom_metric('OCRError', 1, dimensions={'ProcessingMode': 'batch_oficio'})
         
         return {
             'success': False,
@@ -238,8 +464,8 @@ def process_batch_oficio_enhanced(message_data: Dict[str, Any], context) -> Dict
             'error': str(e),
             'error_type': type(e).__name__
         })
-        tracking_service.update_job_status(job_id, 'error', f'Processing error: {str(e)}')
-        put_custom_metric('UnexpectedError', 1, dimensions={'JobId': job_id})
+        finish_job(job_id, 'error', f'Processing error: {str(e)}')
+        put_custom_metric('UnexpectedError', 1, dimensions={'ProcessingMode': 'batch_oficio'})
         
         return {
             'success': False,
@@ -251,41 +477,56 @@ def process_batch_oficio_enhanced(message_data: Dict[str, Any], context) -> Dict
 def process_individual_job_enhanced(job_id: str, context) -> Dict[str, Any]:
     """Process individual job with enhanced OCR"""
     try:
-        Logger.log_processing_step(logger, f"Processing individual enhanced job", {'job_id': job_id})
-        
-        # Check remaining time
-        remaining_time = context.get_remaining_time_in_millis() / 1000
-        if remaining_time < 120:
-            raise OCRBaseException(f"Insufficient time remaining: {remaining_time:.1f}s")
+        Logger.log_processing_step(logger, "Processing individual enhanced job", {'job_id': job_id},
+                                   level=logging.DEBUG)
         
         # Load job data
         job_data = tracking_service.get_job_data(job_id)
         if not job_data:
             raise OCRBaseException(f"Job data not found for {job_id}")
         
-        # Download PDF
-        pdf_content = storage_service.download_job_pdf(job_id)
-        
-        # Enhanced OCR processing
-        ocr_result = ocr_service.extract_text_from_pdf(
-            pdf_content, 
-            job_id=job_id, 
-            document_type='legal_document'
-        )
+        if config.OCR_DOCUMENT_SOURCE == 'presigned_url':
+            # Mistral fetches the PDF itself: no download and no base64 copy
+            ensure_time(context, 60, 'ocr')
+            job_pdf = storage_service.locate_job_pdf(job_id)
+            ocr_result = extract_with_cache(
+                f"etag-{job_pdf['etag']}",
+                job_id,
+                lambda: ocr_service.extract_text_from_url(
+                    storage_service.presign_oficio_pdf(job_pdf),
+                    job_id=job_id,
+                    document_type='legal_document'
+                )
+            )
+        else:
+            # Download PDF
+            ensure_time(context, 90, 'pdf_download')
+            pdf_content = storage_service.download_job_pdf(job_id)
+            
+            # Enhanced OCR processing
+            ensure_time(context, 60, 'ocr')
+            ocr_result = extract_with_cache(
+                hashlib.sha256(pdf_content).hexdigest(),
+                job_id,
+                lambda: ocr_service.extract_text_from_pdf(
+                    pdf_content, 
+                    job_id=job_id, 
+                    document_type='legal_document'
+                )
+            )
         
         if not ocr_result.success:
             raise OCRBaseException(f"Enhanced OCR failed: {ocr_result.error}")
         
         # Post-OCR validation and enrichment
-        validator = PostOCRValidator()
-        ocr_result_enriched = validator.enrich_ocr_result(ocr_result)
+        ocr_result_enriched = post_ocr_validator.enrich_ocr_result(ocr_result)
         
         # Format and store results
         formatted_result = format_enhanced_result(ocr_result_enriched, {'job_id': job_id})
         storage_service.save_ocr_result(job_id, formatted_result)
         
         # Update tracking
-        tracking_service.update_job_status(
+        finish_job(
             job_id, 
             'completed', 
             f'Individual enhanced processing completed - Confidence: {ocr_result.confidence}'
@@ -300,7 +541,7 @@ def process_individual_job_enhanced(job_id: str, context) -> Dict[str, Any]:
         })
         
         # Send metrics
-        send_processing_metrics(processing_stats, job_id)
+        send_processing_metrics(processing_stats, 'individual')
         
         return {
             'success': True,
@@ -314,8 +555,8 @@ def process_individual_job_enhanced(job_id: str, context) -> Dict[str, Any]:
             'job_id': job_id,
             'error': str(e)
         })
-        tracking_service.update_job_status(job_id, 'error', f'Individual enhanced job error: {str(e)}')
-        put_custom_metric('IndividualJobError', 1, dimensions={'JobId': job_id})
+        finish_job(job_id, 'error', f'Individual enhanced job error: {str(e)}')
+        put_custom_metric('IndividualJobError', 1, dimensions={'ProcessingMode': 'individual'})
         
         return {
             'success': False,
@@ -328,33 +569,46 @@ def format_enhanced_result(ocr_result: OCRResult, message_data: Dict[str, Any])
     """
     Format enhanced OCR result maintaining compatibility with existing CRM structure
     """
+    # Hot fields bound once for the whole function
+    metadata = ocr_result.metadata or {}
+    text = ocr_result.text
+    confidence = ocr_result.confidence
+    raw_structured_data = ocr_result.structured_data
+    persons_count = 0
+    # The job finishes here; the CRM entry reuses this timestamp
+    processed_at = datetime.utcnow().isoformat()
+    
     try:
         # Base structure
         formatted_result = {
             'success': True,
-            'processed_at': datetime.utcnow().isoformat(),
-            'job_id': ocr_result.metadata.get('job_id'),
+            'processed_at': processed_at,
+            'job_id': metadata.get('job_id'),
             'processing_time': ocr_result.processing_time,
             'extraction_method': 'enhanced_mistral_ocr_v2',
-            'confidence': ocr_result.confidence,
+            'confidence': confidence,
             'enhanced_processing': True
         }
         
         # Add structured data if available
-        if ocr_result.structured_data:
+        if raw_structured_data:
             # Ensure structured_data is a dictionary
-            if isinstance(ocr_result.structured_data, str):
+            if isinstance(raw_structured_data, str):
                 try:
-                    structured_data = json.loads(ocr_result.structured_data)
-                    logger.info(f"📄 Parsed structured_data from JSON string")
-                except json.JSONDecodeError:
-                    logger.warning(f"⚠️ Could not parse structured_data as JSON, using as text")
-                    structured_data = {'texto_completo': ocr_result.structured_data}
-            elif isinstance(ocr_result.structured_data, dict):
-                structured_data = ocr_result.structured_data
+                    structured_data = orjson.loads(raw_structured_data)
+                    logger.debug("📄 Parsed structured_data from JSON string")
+                except orjson.JSONDecodeError:
+                    logger.warning("⚠️ Could not parse structured_data as JSON, using as text")
+                    structured_data = {'texto_completo': raw_structured_data}
+            elif isinstance(raw_structured_data, dict):
+                structured_data = raw_structured_data
             else:
-                logger.warning(f"⚠️ Unexpected structured_data type: {type(ocr_result.structured_data)}")
-                structured_data = {'texto_completo': str(ocr_result.structured_data)}
+                logger.warning("⚠️ Unexpected structured_data type: %s", type(raw_structured_data))
+                structured_data = {'texto_completo': str(raw_structured_data)}
+            
+            # Keep the parsed dict on the result so calculate_processing_stats
+            # sees the same data instead of the raw string
+            ocr_result.structured_data = structured_data
             
             # Classification information
             if 'clasificacion' in structured_data and isinstance(structured_data['clasificacion'], dict):
@@ -385,32 +639,31 @@ def format_enhanced_result(ocr_result: OCRResult, message_data: Dict[str, Any])
                 lista_clientes = structured_data['lista_clientes']
                 if isinstance(lista_clientes, list) and lista_clientes:
                     personas_list = lista_clientes
-                    logger.info(f"✅ Found {len(personas_list)} persons in lista_clientes")
+                    logger.debug("✅ Found %s persons in lista_clientes", len(personas_list))
             
             # Prioridad 2: lista_personas (campo alternativo)
             elif 'lista_personas' in structured_data:
                 lista_personas = structured_data['lista_personas']
                 if isinstance(lista_personas, dict) and 'listado' in lista_personas:
                     personas_list = lista_personas['listado']
-                    logger.info(f"✅ Found {len(personas_list)} persons in lista_personas.listado")
+                    logger.debug("✅ Found %s persons in lista_personas.listado", len(personas_list))
                 elif isinstance(lista_personas, list):
                     personas_list = lista_personas
-                    logger.info(f"✅ Found {len(personas_list)} persons in lista_personas")
+                    logger.debug("✅ Found %s persons in lista_personas", len(personas_list))
             
             # Formatear personas para CRM si se encontraron
             if personas_list:
-                formatted_personas = format_personas_for_crm(personas_list)
-                monto_total = sum(p.get('monto_numerico', 0) for p in formatted_personas)
+                formatted_personas, monto_total = format_personas_for_crm(personas_list)
+                persons_count = len(formatted_personas)
                 
                 formatted_result['lista_personas'] = {
                     'listado': formatted_personas,
                     'monto_total': monto_total
                 }
                 
-                logger.info(f"✅ Formatted {len(formatted_personas)} persons for CRM")
-                logger.info(f"💰 Total amount: {monto_total}")
+                logger.debug("✅ Formatted %s persons for CRM - 💰 Total amount: %s", persons_count, monto_total)
             else:
-                logger.warning(f"⚠️ No persons found in structured_data")
+                logger.warning("⚠️ No persons found in structured_data")
                 formatted_result['lista_personas'] = {'listado': [], 'monto_total': 0}
             
             # Keywords found
@@ -418,32 +671,37 @@ def format_enhanced_result(ocr_result: OCRResult, message_data: Dict[str, Any])
                 formatted_result['palabras_clave_encontradas'] = structured_data['palabras_clave_encontradas']
             
             # Complete text
-            formatted_result['texto_completo'] = structured_data.get('texto_completo', ocr_result.text)
+            formatted_result['texto_completo'] = structured_data.get('texto_completo', text)
             
-            # Raw structured data for reference
-            formatted_result['structured_data_raw'] = structured_data
+            # Raw structured data for reference, minus the fields already
+            # copied verbatim to the top level (texto_completo above all), so
+            # the saved result does not carry them twice
+            formatted_result['structured_data_raw'] = {
+                key: value for key, value in structured_data.items()
+                if formatted_result.get(key) is not value
+            }
         
         else:
             # Fallback for no structured data
             formatted_result.update({
                 'tipo_oficio_detectado': 'Documento procesado',
-                'nivel_confianza': ocr_result.confidence,
+                'nivel_confianza': confidence,
                 'palabras_clave_encontradas': [],
-                'informacion_extraida': extract_basic_info_from_text(ocr_result.text),
-                'texto_completo': ocr_result.text,
+                'informacion_extraida': extract_basic_info_from_text(text),
+                'texto_completo': text,
                 'lista_personas': {'listado': [], 'monto_total': 0}
             })
         
         # Enhanced metadata
         formatted_result['ocr_metadata'] = {
-            'confidence': ocr_result.confidence,
-            'text_length': len(ocr_result.text),
-            'document_type': ocr_result.metadata.get('document_type', 'legal_document'),
-            'has_structured_data': bool(ocr_result.structured_data),
+            'confidence': confidence,
+            'text_length': len(text),
+            'document_type': metadata.get('document_type', 'legal_document'),
+            'has_structured_data': bool(raw_structured_data),
             'extraction_method': 'enhanced_mistral_ocr_v2',
-            'api_model': ocr_result.metadata.get('api_model', 'mistral-ocr-latest'),
+            'api_model': metadata.get('api_model', 'mistral-ocr-latest'),
             'processing_version': '2.1',
-            'persons_found': len(formatted_result.get('lista_personas', {}).get('listado', []))
+            'persons_found': persons_count
         }
         
         return formatted_result
@@ -454,86 +712,101 @@ def format_enhanced_result(ocr_result: OCRResult, message_data: Dict[str, Any])
         return {
             'success': True,
             'error': f'Formatting error: {str(e)}',
-            'texto_completo': ocr_result.text,
-            'processed_at': datetime.utcnow().isoformat(),
+            'texto_completo': text,
+            'processed_at': processed_at,
             'extraction_method': 'enhanced_mistral_ocr_v2_fallback',
             'enhanced_processing': True,
             'lista_personas': {'listado': [], 'monto_total': 0}
         }
 
-def format_personas_for_crm(personas_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Format personas list for CRM integration"""
+def format_personas_for_crm(personas_list: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], float]:
+    """Format personas list for CRM integration; returns the list and its total amount"""
     try:
-        formatted_personas = []
+        # Lista preasignada al tamaño de entrada; se recorta al final porque
+        # las personas sin nombre se descartan
+        formatted_personas = [None] * len(personas_list)
+        count = 0
+        monto_total = 0.0
+        _clean = clean_value
+        log_each = logger.isEnabledFor(logging.DEBUG)
         
         for i, persona in enumerate(personas_list):
             if not persona or not isinstance(persona, dict):
                 continue
                 
             # Extract and split full name
-            nombre_completo = clean_value(persona.get('nombre_completo', ''))
+            nombre_completo = _clean(persona.get('nombre_completo', ''))
             if not nombre_completo:
                 continue
                 
-            nombres = nombre_completo.split()
+            # At most 4 tokens: nombre, paterno, materno and the rest
+            nombres = nombre_completo.split(None, 3)
+            n_nombres = len(nombres)
             
             # 🔧 FIX: Obtener identificación de AMBOS campos posibles
             identificacion = (
-                clean_value(persona.get('numero_identificacion', '')) or 
-                clean_value(persona.get('identificacion', ''))
+                _clean(persona.get('numero_identificacion', '')) or 
+                _clean(persona.get('identificacion', ''))
             )
             
             # Parse amount
-            monto_str = clean_value(persona.get('monto', '0'))
+            monto_str = _clean(persona.get('monto', '0'))
             monto_numerico = persona.get('monto_numerico', 0.0)
             
             if monto_numerico == 0.0 and monto_str:
                 try:
-                    monto_clean = monto_str.replace('B/.', '').replace(',', '').strip()
-                    monto_numerico = float(monto_clean) if monto_clean else 0.0
+                    monto_numerico = float(_MONTO_STRIP_RE.sub('', monto_str) or 0)
                 except:
                     monto_numerico = 0.0
             
             formatted_person = {
                 'secuencia': i + 1,
                 'nombre_completo': nombre_completo,
-                'nombre': nombres[0] if nombres else '',
-                'apellido_paterno': nombres[1] if len(nombres) > 1 else '',
-                'apellido_materno': nombres[2] if len(nombres) > 2 else '',
-                'nombre_segundo': ' '.join(nombres[3:]) if len(nombres) > 3 else '',
+                'nombre': nombres[0],
+                'apellido_paterno': nombres[1] if n_nombres > 1 else '',
+                'apellido_materno': nombres[2] if n_nombres > 2 else '',
+                # split(None, 3) leaves the rest as-is; collapse its inner whitespace
+                'nombre_segundo': ' '.join(nombres[3].split()) if n_nombres > 3 else '',
                 'identificacion': identificacion,
                 'numero_identificacion': identificacion,  # Campo duplicado para compatibilidad
-                'numero_cuenta': clean_value(persona.get('numero_cuenta', '')),
-                'numero_ruc': clean_value(persona.get('numero_ruc', '')),
+                'numero_cuenta': _clean(persona.get('numero_cuenta', '')),
+                'numero_ruc': _clean(persona.get('numero_ruc', '')),
                 'monto': monto_str,
                 'monto_numerico': monto_numerico,
-                'expediente': clean_value(persona.get('expediente', '')),
-                'observaciones': clean_value(persona.get('observaciones', f'Persona extraída por OCR v2 - Secuencia: {i + 1}'))
+                'expediente': _clean(persona.get('expediente', '')),
+                'observaciones': _clean(persona.get('observaciones', f'Persona extraída por OCR v2 - Secuencia: {i + 1}'))
             }
             
             # Log para debugging
-            logger.info(f"👤 Formatted person {i+1}: {nombre_completo} (ID: {identificacion}, Monto: {monto_numerico})")
+            if log_each:
+                logger.debug("👤 Formatted person %s: %s (ID: %s, Monto: %s)",
+                             i + 1, nombre_completo, identificacion, monto_numerico)
             
-            formatted_personas.append(formatted_person)
+            formatted_personas[count] = formatted_person
+            count += 1
+            monto_total += monto_numerico
         
-        logger.info(f"✅ Successfully formatted {len(formatted_personas)} persons for CRM")
-        return formatted_personas
+        del formatted_personas[count:]
+        logger.debug("✅ Successfully formatted %s persons for CRM", count)
+        return formatted_personas, monto_total
         
     except Exception as e:
         Logger.log_error(logger, f"Error formatting personas list", {'error': str(e)})
-        return []
+        return [], 0.0
 
 def clean_value(value: Any) -> str:
     """Clean and normalize any value"""
-    if value is None or value == 'null':
+    # Strings are by far the common case, so they are checked first
+    if type(value) is str:
+        value = value.strip()
+        return '' if value == 'null' else value
+    
+    if value is None:
         return ''
     
     if isinstance(value, (int, float)):
         return str(value)
     
-    if isinstance(value, str):
-        return value.strip()
-    
     return str(value).strip()
 
 def parse_date_value(date_str: str) -> str:
@@ -547,33 +820,24 @@ def parse_date_value(date_str: str) -> str:
 def extract_basic_info_from_text(text: str) -> Dict[str, Any]:
     """Extract basic information from text when structured data is not available"""
     try:
-        import re
-        
         info = {}
         
         # Search for oficio number
-        oficio_pattern = r'(?:oficio|no\.?)\s*:?\s*([A-Za-z0-9\-]+)'
-        oficio_match = re.search(oficio_pattern, text, re.IGNORECASE)
+        oficio_match = _OFICIO_RE.search(text)
         if oficio_match:
             info['numero_oficio'] = oficio_match.group(1)
         
         # Search for authority
-        autoridad_patterns = [
-            r'(juzgado [^\.]+)',
-            r'(tribunal [^\.]+)',
-            r'(ministerio [^\.]+)'
-        ]
-        for pattern in autoridad_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _AUTORIDAD_RES:
+            match = pattern.search(text)
             if match:
                 info['autoridad'] = match.group(1)
                 break
         
-        # Search for dates
-        date_pattern = r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})'
-        date_matches = re.findall(date_pattern, text)
-        if date_matches:
-            info['fecha_emision'] = date_matches[0]
+        # Search for dates (only the first one is used)
+        date_match = _FECHA_RE.search(text)
+        if date_match:
+            info['fecha_emision'] = date_match.group(1)
         
         return info
         
@@ -584,15 +848,19 @@ def extract_basic_info_from_text(text: str) -> Dict[str, Any]:
 def calculate_processing_stats(ocr_result: OCRResult, formatted_result: Dict[str, Any]) -> Dict[str, Any]:
     """Calculate processing statistics with detailed content analysis"""
     
+    text = ocr_result.text
+    raw_structured_data = ocr_result.structured_data
+    lista_personas = formatted_result.get('lista_personas', {})
+    
     # Base stats
     stats = {
-        'text_length': len(ocr_result.text),
+        'text_length': len(text),
         'processing_time': ocr_result.processing_time,
         'confidence': ocr_result.confidence,
-        'has_structured_data': bool(ocr_result.structured_data),
-        'structured_fields_count': len(ocr_result.structured_data) if ocr_result.structured_data else 0,
-        'persons_count': len(formatted_result.get('lista_personas', {}).get('listado', [])),
-        'total_amount': formatted_result.get('lista_personas', {}).get('monto_total', 0),
+        'has_structured_data': bool(raw_structured_data),
+        'structured_fields_count': len(raw_structured_data) if raw_structured_data else 0,
+        'persons_count': formatted_result.get('ocr_metadata', {}).get('persons_found', 0),
+        'total_amount': lista_personas.get('monto_total', 0),
         'classification': formatted_result.get('clasificacion', {}),
         'extraction_method': 'enhanced_mistral_ocr_v2'
     }
@@ -600,24 +868,26 @@ def calculate_processing_stats(ocr_result: OCRResult, formatted_result: Dict[str
     # 🔍 LOGGING DETALLADO DE CONTENIDO EXTRAÍDO
     job_id = ocr_result.metadata.get('job_id', 'unknown')
     
-    # Text preview (mostrar más caracteres)
-    text_preview = ocr_result.text[:500] + '...' if len(ocr_result.text) > 500 else ocr_result.text
-    Logger.log_success(logger, f"📄 OCR Text Preview", {
-        'job_id': job_id,
-        'text_preview': text_preview,
-        'full_text_length': len(ocr_result.text)
-    })
-    
-    # Texto completo completo (sin truncar)
-    Logger.log_success(logger, f"📝 OCR Complete Text", {
-        'job_id': job_id,
-        'complete_text': ocr_result.text,
-        'text_length': len(ocr_result.text)
-    })
+    # El texto OCR solo se vuelca a DEBUG; text_length ya va en las stats
+    # que se registran a INFO al terminar el job
+    if logger.isEnabledFor(logging.DEBUG):
+        Logger.log_processing_step(logger, "📄 OCR Text Preview", {
+            'job_id': job_id,
+            'text_preview': text[:500],
+            'full_text_length': stats['text_length']
+        }, level=logging.DEBUG)
+        
+        # Texto completo completo (sin truncar)
+        Logger.log_processing_step(logger, "📝 OCR Complete Text", {
+            'job_id': job_id,
+            'complete_text': text,
+            'text_length': stats['text_length']
+        }, level=logging.DEBUG)
     
-    # Detailed structured data analysis
-    if ocr_result.structured_data and isinstance(ocr_result.structured_data, dict):
-        structured_data = ocr_result.structured_data
+    # Detailed structured data analysis: per-section dumps only at DEBUG,
+    # so the previews below are not even built at INFO and above
+    if logger.isEnabledFor(logging.DEBUG) and raw_structured_data and isinstance(raw_structured_data, dict):
+        structured_data = raw_structured_data
         
         # Classification details
         if 'clasificacion' in structured_data and isinstance(structured_data['clasificacion'], dict):
@@ -629,7 +899,7 @@ def calculate_processing_stats(ocr_result: OCRResult, formatted_result: Dict[str
                 'departamento': classification.get('departamento', 'N/A'),
                 'confianza': classification.get('confianza', 'N/A'),
                 'id': classification.get('id', 'N/A')
-            })
+            }, level=logging.DEBUG)
         
         # General information details
         if 'informacion_general' in structured_data and isinstance(structured_data['informacion_general'], dict):
@@ -641,7 +911,7 @@ def calculate_processing_stats(ocr_result: OCRResult, formatted_result: Dict[str
                 'fecha': info_general.get('fecha', 'N/A'),
                 'destinatario': info_general.get('destinatario', 'N/A'),
                 'asunto': info_general.get('asunto', 'N/A')[:100] + '...' if info_general.get('asunto', '') else 'N/A'
-            })
+            }, level=logging.DEBUG)
         
         # Persons details
         if 'lista_clientes' in structured_data and isinstance(structured_data['lista_clientes'], list):
@@ -656,7 +926,7 @@ def calculate_processing_stats(ocr_result: OCRResult, formatted_result: Dict[str
                         'monto': p.get('monto', 'N/A')
                     } for p in personas[:3]  # Primeras 3 personas
                 ]
-            })
+            }, level=logging.DEBUG)
         
         # Keywords details
         if 'palabras_clave_encontradas' in structured_data and isinstance(structured_data['palabras_clave_encontradas'], list):
@@ -665,23 +935,25 @@ def calculate_processing_stats(ocr_result: OCRResult, formatted_result: Dict[str
                 'job_id': job_id,
                 'keywords_count': len(keywords),
                 'keywords_preview': keywords[:10]  # Primeras 10 palabras clave
-            })
+            }, level=logging.DEBUG)
         
         # Complete text from structured data
         if 'texto_completo' in structured_data:
             texto_completo = structured_data['texto_completo']
+            texto_completo_length = len(texto_completo)
             Logger.log_success(logger, f"📝 Complete Text from Structured Data", {
                 'job_id': job_id,
-                'texto_completo_length': len(texto_completo),
-                'texto_completo_preview': texto_completo[:500] + '...' if len(texto_completo) > 500 else texto_completo
-            })
+                'texto_completo_length': texto_completo_length,
+                'texto_completo_preview': texto_completo[:500] + '...' if texto_completo_length > 500 else texto_completo
+            }, level=logging.DEBUG)
             
-            # Texto completo completo desde datos estructurados (sin truncar)
+            # Texto completo completo desde datos estructurados (sin truncar),
+            # solo a DEBUG como el texto OCR
             Logger.log_success(logger, f"📄 Complete Structured Text (Full)", {
                 'job_id': job_id,
                 'complete_structured_text': texto_completo,
-                'structured_text_length': len(texto_completo)
-            })
+                'structured_text_length': texto_completo_length
+            }, level=logging.DEBUG)
     
     # Final result summary
     Logger.log_success(logger, f"📊 Final Enhanced Result Summary", {
@@ -691,14 +963,19 @@ def calculate_processing_stats(ocr_result: OCRResult, formatted_result: Dict[str
         'has_informacion_extraida': bool(formatted_result.get('informacion_extraida')),
         'keywords_count': len(formatted_result.get('palabras_clave_encontradas', [])),
         'has_observaciones': bool(formatted_result.get('observaciones', ''))
-    })
+    }, level=logging.DEBUG)
     
     return stats
 
-def send_processing_metrics(stats: Dict[str, Any], job_id: str):
-    """Send detailed processing metrics to CloudWatch"""
+def send_processing_metrics(stats: Dict[str, Any], processing_mode: str):
+    """
+    Send detailed processing metrics to CloudWatch
+    
+    Dimensions stay low-cardinality (batch_oficio / individual): every distinct
+    dimension set is a separate billed metric, so job ids belong in the logs
+    """
     try:
-        dimensions = {'JobId': job_id}
+        dimensions = {'ProcessingMode': processing_mode}
         
         put_custom_metric('ProcessingSuccess', 1, dimensions=dimensions)
         put_custom_metric('ProcessingTime', stats['processing_time'], 'Seconds', dimensions)
@@ -717,49 +994,86 @@ def send_processing_metrics(stats: Dict[str, Any], job_id: str):
     except Exception as e:
         logger.warning(f"Failed to send processing metrics: {str(e)}")
 
-def send_to_crm_queue_enhanced(job_id: str, batch_id: str, message_data: Dict[str, Any], 
-                              enhanced_result: Dict[str, Any]) -> None:
-    """Send enhanced processed result to CRM integration queue"""
-    try:
-        crm_message = {
-            'job_id': job_id,
-            'batch_id': batch_id,
-            'source': message_data.get('source', 's3_direct'),
-            'timestamp': datetime.utcnow().isoformat(),
-            'processing_completed_at': datetime.utcnow().isoformat(),
-            'enhanced_processing': True,
-            'processing_version': '2.1',
-            'has_structured_data': bool(enhanced_result.get('structured_data_raw')),
-            'classification': enhanced_result.get('clasificacion', {}),
-            'persons_count': len(enhanced_result.get('lista_personas', {}).get('listado', [])),
-            'confidence': enhanced_result.get('confidence', 'medium')
-        }
-        
-        sqs_client.send_message(
-            QueueUrl=config.CRM_QUEUE_URL,
-            MessageBody=json.dumps(crm_message, ensure_ascii=False),
-            MessageAttributes={
-                'JobId': {
-                    'StringValue': job_id,
-                    'DataType': 'String'
-                },
-                'BatchId': {
-                    'StringValue': batch_id,
-                    'DataType': 'String'
-                },
-                'Enhanced': {
-                    'StringValue': 'true',
-                    'DataType': 'String'
-                },
-                'Version': {
-                    'StringValue': '2.1',
-                    'DataType': 'String'
-                }
+def build_crm_entry(job_id: str, batch_id: str, message_data: Dict[str, Any], 
+                    enhanced_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the SendMessageBatch entry for the CRM integration queue"""
+    completed_at = enhanced_result.get('processed_at') or datetime.utcnow().isoformat()
+    crm_message = {
+        'job_id': job_id,
+        'batch_id': batch_id,
+        'source': message_data.get('source', 's3_direct'),
+        'timestamp': completed_at,
+        'processing_completed_at': completed_at,
+        'enhanced_processing': True,
+        'processing_version': '2.1',
+        'has_structured_data': enhanced_result.get('ocr_metadata', {}).get('has_structured_data', False),
+        'classification': enhanced_result.get('clasificacion', {}),
+        'persons_count': enhanced_result.get('ocr_metadata', {}).get('persons_found', 0),
+        'confidence': enhanced_result.get('confidence', 'medium')
+    }
+    
+    return {
+        'MessageBody': orjson.dumps(crm_message).decode('utf-8'),
+        'MessageAttributes': {
+            'JobId': {
+                'StringValue': job_id,
+                'DataType': 'String'
+            },
+            'BatchId': {
+                'StringValue': batch_id,
+                'DataType': 'String'
+            },
+            'Enhanced': {
+                'StringValue': 'true',
+                'DataType': 'String'
+            },
+            'Version': {
+                'StringValue': '2.1',
+                'DataType': 'String'
             }
-        )
+        }
+    }
+
+def send_crm_entries(entries: List[Dict[str, Any]]) -> List[int]:
+    """
+    Send CRM entries to the CRM integration queue, up to 10 per request
+    
+    Returns the positions in entries of the messages that could not be sent.
+    """
+    failed_indexes = []
+    for start in range(0, len(entries), CRM_SQS_BATCH_SIZE):
+        pending = list(range(start, min(start + CRM_SQS_BATCH_SIZE, len(entries))))
         
-    except Exception as e:
-        Logger.log_error(logger, f"Error sending enhanced data to CRM queue", {
-            'job_id': job_id,
-            'error': str(e)
-        })
\ No newline at end of file
+        try:
+            for attempt in range(1, CRM_SEND_MAX_ATTEMPTS + 1):
+                # Entry Ids only need to be unique within one request
+                response = get_aws_client('sqs').send_message_batch(
+                    QueueUrl=config.CRM_QUEUE_URL,
+                    Entries=[{'Id': str(i), **entries[index]} for i, index in enumerate(pending)]
+                )
+                
+                # Only service-side failures are worth resending
+                retry = []
+                for failed in response.get('Failed', []):
+                    index = pending[int(failed['Id'])]
+                    if not failed.get('SenderFault') and attempt < CRM_SEND_MAX_ATTEMPTS:
+                        retry.append(index)
+                        continue
+                    failed_indexes.append(index)
+                    Logger.log_error(logger, f"Error sending enhanced data to CRM queue", {
+                        'job_id': entries[index]['MessageAttributes']['JobId']['StringValue'],
+                        'error': failed.get('Message', failed.get('Code'))
+                    })
+                
+                if not retry:
+                    break
+                pending = retry
+                time.sleep(0.1 * 2 ** (attempt - 1))
+            
+        except Exception as e:
+            failed_indexes.extend(pending)
+            Logger.log_error(logger, f"Error sending enhanced data to CRM queue", {
+                'job_ids': [entries[index]['MessageAttributes']['JobId']['StringValue'] for index in pending],
+                'error': str(e)
+            })
+    return failed_indexes
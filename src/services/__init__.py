@@ -13,20 +13,44 @@ This package contains all business logic services:
 - TrackingService: DynamoDB tracking operations
 """
 
-from .pdf_service import PDFService
-from .metadata_service import MetadataService
-from .batch_service import BatchService
-from .queue_service import QueueService
-from .ocr_service import OCRService, OCRResult  # Enhanced version
-from .mistral_service import MistralService, MistralResult  # Text-only version
-from .storage_service import StorageService
-from .tracking_service import TrackingService
-from .post_ocr_validator import PostOCRValidator
+import importlib
+
+# Submodules are imported on first attribute access (PEP 562). Each Lambda
+# imports services.<module> directly, and an eager import here would pull
+# pypdf, requests and every boto3 client setup into all of their cold starts.
+# Dotted entries are absolute module paths, the rest are services submodules
+_EXPORTS = {
+    'PDFService': 'pdf_service',
+    'Oficio': 'shared.models',        # No pypdf on this path
+    'MetadataService': 'metadata_service',
+    'BatchService': 'batch_service',
+    'QueueService': 'queue_service',
+    'OCRService': 'ocr_service',          # Enhanced version
+    'OCRResult': 'ocr_service',
+    'MistralService': 'mistral_service',  # Text-only version
+    'MistralResult': 'mistral_service',
+    'StorageService': 'storage_service',
+    'TrackingService': 'tracking_service',
+    'PostOCRValidator': 'post_ocr_validator'
+}
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_path = module_name if '.' in module_name else f'{__name__}.{module_name}'
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
 
 # Clean services - no hybrid OCR
 
 __all__ = [
     'PDFService',
+    'Oficio',            # Split oficio record
     'MetadataService', 
     'BatchService',
     'QueueService',
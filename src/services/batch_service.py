@@ -1,48 +1,71 @@
 # src/services/batch_service.py
-import boto3
+from boto3.dynamodb.types import TypeSerializer
 import uuid
+import time
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 
-from shared.config import Config
+from shared.config import Config, get_aws_resource
+from shared.models import Oficio
 
 logger = logging.getLogger(__name__)
 config = Config()
 
+# Job rows are written in BatchWriteItem-sized chunks on parallel threads
+JOB_WRITE_CHUNK_SIZE = 25
+JOB_WRITE_MAX_WORKERS = 4
+
+# TransactWriteItems accepts at most 100 actions per call
+TRANSACT_MAX_ITEMS = 100
+
+# Retries for UnprocessedItems returned by BatchWriteItem
+JOB_WRITE_MAX_ATTEMPTS = 5
+
+_serializer = TypeSerializer()
+
+def _marshal(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a plain dict into low-level DynamoDB attribute values"""
+    serialize = _serializer.serialize
+    return {k: serialize(v) for k, v in item.items() if v is not None}
+
 class BatchService:
     """Service for managing batch operations"""
     
     def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb')
+        self.dynamodb = get_aws_resource('dynamodb')
         self.table = self.dynamodb.Table(config.BATCH_TRACKING_TABLE)
+        self.job_table = self.dynamodb.Table(config.JOB_TRACKING_TABLE)
     
     def create_batch(self, metadata: Dict[str, Any], source: str = 's3_direct') -> str:
         """Create a new batch for tracking"""
         try:
-            batch_id = f"batch_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
+            now = datetime.utcnow()
+            now_iso = now.isoformat()
+            batch_id = f"batch_{now.strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
             
             # Create batch record
             batch_record = {
                 'batch_id': batch_id,
                 'status': 'processing',
                 'source': source,
-                'created_at': datetime.utcnow().isoformat(),
+                'created_at': now_iso,
                 'metadata': metadata,
                 'oficios_count': 0,
                 'completed_count': 0,
                 'error_count': 0,
-                'last_updated': datetime.utcnow().isoformat()
+                'last_updated': now_iso
             }
             
             # Store in DynamoDB
             self.table.put_item(Item=batch_record)
             
-            logger.info(f"📦 Batch created: {batch_id}")
+            logger.info("📦 Batch created: %s", batch_id)
             return batch_id
             
         except Exception as e:
-            logger.error(f"❌ Error creating batch: {str(e)}")
+            logger.error("❌ Error creating batch: %s", e)
             raise
     
     def update_status(self, batch_id: str, status: str, message: Optional[str] = None) -> None:
@@ -69,12 +92,94 @@ class BatchService:
                 }
             )
             
-            logger.info(f"📦 Batch {batch_id} status updated: {status}")
+            logger.info("📦 Batch %s status updated: %s", batch_id, status)
             
         except Exception as e:
-            logger.error(f"❌ Error updating batch status: {str(e)}")
+            logger.error("❌ Error updating batch status: %s", e)
             raise
     
+    def register_oficios(self, batch_id: str, oficios: List[Oficio]) -> None:
+        """Create one job tracking row per oficio using batched writes"""
+        try:
+            created_at = datetime.utcnow().isoformat()
+            items = [{
+                'job_id': oficio.oficio_id,
+                'batch_id': batch_id,
+                'status': 'queued',
+                'oficio_number': oficio.oficio_number,
+                'total_pages': oficio.total_pages,
+                's3_key': oficio.s3_key,
+                'created_at': created_at,
+                'updated_at': created_at
+            } for oficio in oficios]
+            
+            # Small batches go in a single transaction together with the
+            # batch summary update, so job rows and oficios_count never
+            # disagree; larger ones fall back to chunked batch writes
+            if len(items) + 1 <= TRANSACT_MAX_ITEMS:
+                self._transact_register(batch_id, items, created_at)
+                logger.info("📦 Registered %s job records for batch %s (transactional)", len(items), batch_id)
+                return
+            
+            chunks = [items[i:i + JOB_WRITE_CHUNK_SIZE] for i in range(0, len(items), JOB_WRITE_CHUNK_SIZE)]
+            if chunks:
+                with ThreadPoolExecutor(max_workers=min(JOB_WRITE_MAX_WORKERS, len(chunks))) as executor:
+                    # list() surfaces the first failed chunk
+                    list(executor.map(self._write_job_chunk, chunks))
+            
+            # Summary row goes last, once every job row is in place
+            self.dynamodb.meta.client.update_item(**self._summary_update(batch_id, len(items), created_at))
+            
+            logger.info("📦 Registered %s job records for batch %s", len(oficios), batch_id)
+            
+        except Exception as e:
+            logger.error("❌ Error registering job records: %s", e)
+            # Don't raise exception to avoid breaking main flow
+    
+    def _summary_update(self, batch_id: str, oficios_count: int, updated_at: str) -> Dict[str, Any]:
+        """Low-level update setting oficios_count on the batch summary row"""
+        serialize = _serializer.serialize
+        return {
+            'TableName': self.table.name,
+            'Key': {'batch_id': serialize(batch_id)},
+            'UpdateExpression': 'SET oficios_count = :count, last_updated = :updated',
+            'ExpressionAttributeValues': {
+                ':count': serialize(oficios_count),
+                ':updated': serialize(updated_at)
+            }
+        }
+    
+    def _transact_register(self, batch_id: str, items: List[Dict[str, Any]], updated_at: str) -> None:
+        """Put all job rows and update the batch summary row in one ACID call"""
+        transact_items = [{
+            'Put': {
+                'TableName': self.job_table.name,
+                'Item': _marshal(item)
+            }
+        } for item in items]
+        transact_items.append({'Update': self._summary_update(batch_id, len(items), updated_at)})
+        self.dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+    
+    def _write_job_chunk(self, items: List[Dict[str, Any]]) -> None:
+        """Write one chunk of job rows from a worker thread"""
+        # The low-level client is thread-safe and skips the resource layer's
+        # per-call type inspection; items are marshalled once up front.
+        # BatchWriteItem rejects repeated keys in one request, so the last
+        # row per job_id wins
+        table_name = self.job_table.name
+        put_requests = [{'PutRequest': {'Item': _marshal(item)}}
+                    for item in {item['job_id']: item for item in items}.values()]
+        client = self.dynamodb.meta.client
+        
+        for attempt in range(JOB_WRITE_MAX_ATTEMPTS):
+            response = client.batch_write_item(RequestItems={table_name: put_requests})
+            put_requests = response.get('UnprocessedItems', {}).get(table_name)
+            if not put_requests:
+                return
+            time.sleep(min(0.05 * (2 ** attempt), 1.0))
+        
+        raise RuntimeError(f"{len(put_requests)} job rows left unprocessed after {JOB_WRITE_MAX_ATTEMPTS} attempts")
+    
     def mark_as_failed(self, batch_id: str, error: str) -> None:
         """Mark batch as failed with error"""
         self.update_status(batch_id, 'failed', f'Processing failed: {error}')
\ No newline at end of file
@@ -1,5 +1,5 @@
 # src/services/metadata_service.py
-import PyPDF2
+import pypdf
 import io
 import re
 import logging
@@ -10,23 +10,65 @@ from shared.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
 
+# Extraction patterns, compiled once per container
+_METADATA_PATTERNS = {
+    field: tuple(re.compile(pattern, re.IGNORECASE) for pattern in field_patterns)
+    for field, field_patterns in {
+        'empresa': [
+            r'empresa:\s*([^\n\r]+)',
+            r'cliente:\s*([^\n\r]+)',
+            r'organizacion:\s*([^\n\r]+)'
+        ],
+        'cantidad_oficios': [
+            r'cantidad_oficios:\s*(\d+)',
+            r'cantidad:\s*(\d+)',
+            r'total_oficios:\s*(\d+)',
+            r'oficios:\s*(\d+)'
+        ],
+        'origen': [
+            r'origen:\s*([^\n\r]+)',
+            r'provincia:\s*([^\n\r]+)',
+            r'ubicacion:\s*([^\n\r]+)'
+        ],
+        'observaciones': [
+            r'observaciones:\s*([^\n\r]+)',
+            r'comentarios:\s*([^\n\r]+)',
+            r'notas:\s*([^\n\r]+)'
+        ],
+        'fecha': [
+            r'fecha:\s*([^\n\r]+)',
+            r'date:\s*([^\n\r]+)'
+        ],
+        'operador': [
+            r'operador:\s*([^\n\r]+)',
+            r'usuario:\s*([^\n\r]+)',
+            r'procesado_por:\s*([^\n\r]+)'
+        ]
+    }.items()
+}
+
 class MetadataService:
     """Service for extracting metadata from PDFs"""
     
-    def extract_from_pdf_first_page(self, pdf_content: bytes) -> Dict[str, Any]:
+    def extract_from_pdf_first_page(self, pdf_content: bytes,
+                                    pdf_reader: Optional[pypdf.PdfReader] = None,
+                                    first_page_text: Optional[str] = None) -> Dict[str, Any]:
         """Extract metadata from first page of PDF"""
         try:
             logger.info("📋 Extracting metadata from PDF first page")
             
-            # Open PDF and get first page
-            pdf_stream = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_stream)
+            # Open PDF (unless the caller already parsed it) and get first page
+            if pdf_reader is None:
+                pdf_stream = io.BytesIO(pdf_content)
+                pdf_reader = pypdf.PdfReader(pdf_stream)
             
             if len(pdf_reader.pages) == 0:
                 raise ValidationError("PDF is empty")
             
-            first_page = pdf_reader.pages[0]
-            text = first_page.extract_text()
+            # Reuse the caller's extracted text when available
+            if first_page_text is None:
+                first_page_text = pdf_reader.pages[0].extract_text()
+            text = first_page_text
             
             # Extract metadata using patterns
             metadata = self._parse_metadata_text(text)
@@ -39,11 +81,11 @@ class MetadataService:
                 'source': 's3_direct'
             })
             
-            logger.info(f"📊 Metadata extracted: {metadata}")
+            logger.info("📊 Metadata extracted: %s", metadata)
             return metadata
             
         except Exception as e:
-            logger.error(f"❌ Error extracting metadata: {str(e)}")
+            logger.error("❌ Error extracting metadata: %s", e)
             raise ValidationError(f"Metadata extraction failed: {str(e)}")
     
     def _parse_metadata_text(self, text: str) -> Dict[str, Any]:
@@ -52,40 +94,6 @@ class MetadataService:
         # Normalize text
         normalized_text = text.lower().replace('\n', ' ').replace('\r', ' ')
         
-        # Define extraction patterns
-        patterns = {
-            'empresa': [
-                r'empresa:\s*([^\n\r]+)',
-                r'cliente:\s*([^\n\r]+)',
-                r'organizacion:\s*([^\n\r]+)'
-            ],
-            'cantidad_oficios': [
-                r'cantidad_oficios:\s*(\d+)',
-                r'cantidad:\s*(\d+)',
-                r'total_oficios:\s*(\d+)',
-                r'oficios:\s*(\d+)'
-            ],
-            'origen': [
-                r'origen:\s*([^\n\r]+)',
-                r'provincia:\s*([^\n\r]+)',
-                r'ubicacion:\s*([^\n\r]+)'
-            ],
-            'observaciones': [
-                r'observaciones:\s*([^\n\r]+)',
-                r'comentarios:\s*([^\n\r]+)',
-                r'notas:\s*([^\n\r]+)'
-            ],
-            'fecha': [
-                r'fecha:\s*([^\n\r]+)',
-                r'date:\s*([^\n\r]+)'
-            ],
-            'operador': [
-                r'operador:\s*([^\n\r]+)',
-                r'usuario:\s*([^\n\r]+)',
-                r'procesado_por:\s*([^\n\r]+)'
-            ]
-        }
-        
         # Initialize with defaults
         metadata = {
             'empresa': 'No especificado',
@@ -99,9 +107,9 @@ class MetadataService:
         
         # Extract each field
         extracted_fields = 0
-        for field, field_patterns in patterns.items():
+        for field, field_patterns in _METADATA_PATTERNS.items():
             for pattern in field_patterns:
-                match = re.search(pattern, normalized_text, re.IGNORECASE)
+                match = pattern.search(normalized_text)
                 if match:
                     value = match.group(1).strip()
                     
@@ -1,5 +1,5 @@
 # src/services/mistral_service.py - VERSIÓN SIMPLIFICADA
-import json
+import orjson
 import requests
 import logging
 import random
@@ -39,6 +39,13 @@ class MistralService:
         self.timeout = 120  # 2 minutes for text analysis
         self.base_delay = 2
         self.max_delay = 60
+        
+        # analysis_type -> prompt builder, resolved with one dict lookup
+        self._prompt_builders = {
+            "legal_analysis": self._create_legal_analysis_prompt,
+            "document_summary": self._create_summary_prompt,
+            "entity_extraction": self._create_entity_extraction_prompt
+        }
     
     def analyze_text_content(self, text: str, analysis_type: str = "legal_analysis", 
                            custom_prompt: str = None) -> MistralResult:
@@ -51,14 +58,11 @@ class MistralService:
             logger.info(f"Starting Mistral text analysis - Type: {analysis_type}")
             
             # Prepare prompt based on analysis type
+            build_prompt = self._prompt_builders.get(analysis_type)
             if custom_prompt:
                 prompt = custom_prompt
-            elif analysis_type == "legal_analysis":
-                prompt = self._create_legal_analysis_prompt(text)
-            elif analysis_type == "document_summary":
-                prompt = self._create_summary_prompt(text)
-            elif analysis_type == "entity_extraction":
-                prompt = self._create_entity_extraction_prompt(text)
+            elif build_prompt:
+                prompt = build_prompt(text)
             else:
                 prompt = f"Analyze the following text and provide structured insights:\n\n{text}"
             
@@ -195,6 +199,7 @@ class MistralService:
             "max_tokens": 2000,
             "top_p": 0.9
         }
+        payload_bytes = orjson.dumps(payload)
         
         for attempt in range(self.max_retries):
             try:
@@ -203,12 +208,12 @@ class MistralService:
                 response = requests.post(
                     self.chat_api_url,
                     headers=headers,
-                    json=payload,
+                    data=payload_bytes,
                     timeout=self.timeout
                 )
                 
                 if response.status_code == 200:
-                    result = response.json()
+                    result = orjson.loads(response.content)
                     if 'choices' in result and len(result['choices']) > 0:
                         content = result['choices'][0]['message']['content']
                         logger.info(f"Mistral Chat API success on attempt {attempt + 1}")
@@ -241,13 +246,23 @@ class MistralService:
     def _parse_chat_response(self, response: str) -> Dict[str, Any]:
         """Parse and validate Mistral Chat response"""
         try:
-            # Try to find JSON in response
+            # Fast path: the model usually answers with bare JSON, which
+            # parses directly without scanning and copying a substring
+            if response.startswith('{'):
+                try:
+                    parsed = orjson.loads(response)
+                    if isinstance(parsed, dict):
+                        return parsed
+                except orjson.JSONDecodeError:
+                    pass
+            
+            # Otherwise try to find JSON in response (e.g. inside a code fence)
             json_start = response.find('{')
             json_end = response.rfind('}') + 1
             
             if json_start >= 0 and json_end > json_start:
                 json_str = response[json_start:json_end]
-                parsed = json.loads(json_str)
+                parsed = orjson.loads(json_str)
                 
                 # Basic validation
                 if isinstance(parsed, dict):
@@ -262,7 +277,7 @@ class MistralService:
                 "raw_response": response
             }
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON parsing error: {str(e)}")
             return {
                 "tipo_documento": "Error de parsing",
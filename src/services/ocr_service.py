@@ -1,9 +1,12 @@
 # src/services/ocr_service.py - VERSIÓN BASADA EN TU IMPLEMENTACIÓN EXITOSA
-import json
+import hashlib
+import orjson
 import base64
 import logging
 import requests
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import random
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
@@ -11,10 +14,27 @@ from dataclasses import dataclass
 
 from shared.config import Config
 from shared.exceptions import OCRExtractionError, MistralAPIError
+from shared.utils import RateLimiter
 
 logger = logging.getLogger(__name__)
 config = Config()
 
+# Compartido por todos los hilos del contenedor: evita ráfagas que terminan en 429
+_mistral_rate_limiter = RateLimiter(config.MISTRAL_MAX_REQUESTS_PER_SECOND)
+
+# Sesión HTTP por contenedor: mantiene viva la conexión TLS con Mistral entre
+# invocaciones en vez de abrir una nueva en cada llamada. El pool admite una
+# conexión por hilo de registros del OCR processor; urllib3 solo reintenta
+# fallos de conexión (el POST no llegó a enviarse): los errores HTTP los
+# reintenta _call_mistral_ocr_api_with_retry según su tipo
+MISTRAL_CONNECT_TIMEOUT = 5
+_mistral_session = requests.Session()
+_mistral_session.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, connect=3, read=0, status=0, other=0, backoff_factor=0.5)
+))
+
 @dataclass
 class OCRResult:
     """Resultado de extracción OCR"""
@@ -35,7 +55,7 @@ class OCRService:
     def __init__(self):
         self.api_key = config.MISTRAL_API_KEY
         self.api_url = "https://api.mistral.ai/v1/ocr"
-        self.model = "mistral-ocr-latest"
+        self.model = config.MISTRAL_OCR_MODEL
         
         # Configuración optimizada basada en tu implementación
         self.max_retries = 5
@@ -48,21 +68,58 @@ class OCRService:
         self._successful_requests = 0
         self._failed_requests = 0
         self._total_processing_time = 0.0
+        
+        # El schema de anotación es constante: se construye una vez por contenedor
+        self._legal_annotation_schema = self._create_legal_document_annotation_schema()
+        
+        # Versión de la salida OCR (modelo configurado + hash del schema): las
+        # entradas de la caché OCR de otra versión no se reutilizan. Con el
+        # alias '-latest' una actualización del modelo en Mistral no cambia la
+        # clave; solo la caduca OCR_CACHE_TTL_DAYS
+        schema_hash = hashlib.sha256(
+            orjson.dumps(self._legal_annotation_schema, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()[:12]
+        self.cache_version = f"{self.model}-{schema_hash}"
 
     def extract_text_from_pdf(self, pdf_content: bytes, job_id: str = None, document_type: str = 'legal_document') -> OCRResult:
         """
         Extrae texto de PDF usando Mistral OCR con base64
         Basado en tu implementación exitosa
         """
+        try:
+            # Convertir PDF a base64 y enviarlo como data URL
+            pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
+            document_url = f"data:application/pdf;base64,{pdf_base64}"
+        except Exception as e:
+            self._total_requests += 1
+            self._failed_requests += 1
+            logger.error(f"Error in OCRService.extract_text_from_pdf: {str(e)}")
+            return OCRResult(
+                success=False,
+                error=str(e),
+                metadata={'job_id': job_id}
+            )
+        
+        return self._extract_from_document_url(document_url, job_id, document_type, 'mistral_ocr_base64')
+
+    def extract_text_from_url(self, document_url: str, job_id: str = None, document_type: str = 'legal_document') -> OCRResult:
+        """
+        Extrae texto de un PDF que Mistral descarga directamente (p. ej. URL
+        prefirmada de S3): el PDF no pasa por la memoria de la Lambda
+        """
+        return self._extract_from_document_url(document_url, job_id, document_type, 'mistral_ocr_url')
+
+    def _extract_from_document_url(self, document_url: str, job_id: Optional[str], document_type: str,
+                                   extraction_method: str) -> OCRResult:
+        """
+        Llama a Mistral OCR para un documento ya expresado como URL (data URL o https)
+        """
         try:
             start_time = time.time()
             self._total_requests += 1
             
-            # Convertir PDF a base64
-            pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
-            
             # Crear payload usando tu lógica
-            payload = self._build_api_payload(pdf_base64, document_type)
+            payload = self._build_api_payload(document_url, document_type)
             
             # Llamar a la API con reintentos robustos
             api_response = self._call_mistral_ocr_api_with_retry(payload)
@@ -88,7 +145,7 @@ class OCRService:
                 result.metadata.update({
                     'job_id': job_id,
                     'processing_time': processing_time,
-                    'extraction_method': 'mistral_ocr_base64'
+                    'extraction_method': extraction_method
                 })
             else:
                 self._failed_requests += 1
@@ -97,29 +154,40 @@ class OCRService:
             
         except Exception as e:
             self._failed_requests += 1
-            logger.error(f"Error in OCRService.extract_text_from_pdf: {str(e)}")
+            logger.error(f"Error in OCRService OCR extraction: {str(e)}")
             return OCRResult(
                 success=False,
                 error=str(e),
                 metadata={'job_id': job_id}
             )
 
-    def _build_api_payload(self, pdf_base64: str, document_type: str) -> Dict[str, Any]:
+    def warmup(self) -> None:
+        """
+        Abre la conexión TLS con la API durante el init del contenedor, para
+        que el primer registro no pague el handshake
+        """
+        try:
+            _mistral_session.head(self.api_url, timeout=2)
+        except requests.exceptions.RequestException as e:
+            logger.debug("Mistral warmup skipped: %s", e)
+
+    def _build_api_payload(self, document_url: str, document_type: str) -> Dict[str, Any]:
         """
         Construye el payload para la API usando tu lógica
         """
         payload = {
             "model": self.model,
-            "include_image_base64": True
+            # Solo se usan el markdown y la anotación; no pedir las imágenes
+            # de página en base64 evita descargarlas y parsearlas
+            "include_image_base64": False
         }
         
-        # Configurar el documento como data URL
-        data_url = f"data:application/pdf;base64,{pdf_base64}"
-        payload["document"] = {"document_url": data_url}
+        # Documento como data URL (base64) o como URL que Mistral descarga
+        payload["document"] = {"document_url": document_url}
         
         # Configurar annotations para documentos legales
         if document_type == 'legal_document':
-            payload["document_annotation_format"] = self._create_legal_document_annotation_schema()
+            payload["document_annotation_format"] = self._legal_annotation_schema
         
         return payload
 
@@ -390,6 +458,11 @@ class OCRService:
             'Authorization': f'Bearer {self.api_key}'
         }
         
+        # Serializado una sola vez con orjson (bytes UTF-8) y reutilizado en
+        # cada reintento; con json= requests lo re-serializaría con json
+        payload_bytes = orjson.dumps(payload)
+        logger.debug("Mistral OCR payload size: %s bytes", len(payload_bytes))
+        
         for attempt in range(self.max_retries + 1):
             try:
                 logger.info(f"🌐 Mistral OCR API call attempt {attempt + 1}/{self.max_retries + 1}")
@@ -397,16 +470,17 @@ class OCRService:
                 # Timeout progresivo como en tu lambda
                 timeout = 600 + (attempt * 120)  # 10min + 2min por intento
                 
-                response = requests.post(
+                _mistral_rate_limiter.acquire()
+                response = _mistral_session.post(
                     self.api_url,
                     headers=headers,
-                    json=payload,
-                    timeout=timeout
+                    data=payload_bytes,
+                    timeout=(MISTRAL_CONNECT_TIMEOUT, timeout)
                 )
                 
                 if response.status_code == 200:
                     logger.info(f"✅ API call successful on attempt {attempt + 1}")
-                    return response.json()
+                    return orjson.loads(response.content)
                 
                 # Manejar diferentes tipos de errores usando tu lógica
                 error_type, should_retry, wait_time = self._analyze_api_error(response, attempt)
@@ -521,7 +595,7 @@ class OCRService:
                     
                     try:
                         # Intentar parsear como JSON estructurado
-                        parsed_content = json.loads(content)
+                        parsed_content = orjson.loads(content)
                         
                         if isinstance(parsed_content, dict):
                             structured_data = parsed_content
@@ -536,7 +610,7 @@ class OCRService:
                             # Si no es dict, usar como texto plano
                             extracted_text = content
                             
-                    except json.JSONDecodeError:
+                    except orjson.JSONDecodeError:
                         # Si no es JSON válido, usar como texto plano
                         extracted_text = content
                         logger.warning(f"Content is not valid JSON, using as plain text")
@@ -557,9 +631,9 @@ class OCRService:
                         # Si viene como string, intentar parsearlo como JSON
                         if isinstance(structured_data, str):
                             try:
-                                structured_data = json.loads(structured_data)
+                                structured_data = orjson.loads(structured_data)
                                 logger.info(f"✅ Parsed structured_data from string to dict")
-                            except json.JSONDecodeError as e:
+                            except orjson.JSONDecodeError as e:
                                 logger.warning(f"⚠️ Failed to parse structured_data as JSON: {str(e)}")
                                 structured_data = None
             
@@ -571,9 +645,9 @@ class OCRService:
                 # Si viene como string, intentar parsearlo como JSON
                 if isinstance(structured_data, str):
                     try:
-                        structured_data = json.loads(structured_data)
+                        structured_data = orjson.loads(structured_data)
                         logger.info(f"✅ Parsed structured_data from string to dict")
-                    except json.JSONDecodeError as e:
+                    except orjson.JSONDecodeError as e:
                         logger.warning(f"⚠️ Failed to parse structured_data as JSON: {str(e)}")
                         structured_data = None
                 
@@ -608,7 +682,7 @@ class OCRService:
             # Validar que tenemos algo útil
             if not extracted_text and not structured_data:
                 logger.warning("⚠️ No useful content found in API response")
-                logger.warning(f"🔍 Full API response: {json.dumps(api_response, default=str)[:500]}...")
+                logger.warning(f"🔍 Full API response: {orjson.dumps(api_response, default=str)[:500].decode('utf-8', 'ignore')}...")
                 return OCRResult(
                     success=False,
                     error="No text or structured data found in API response",
@@ -1,50 +1,97 @@
 # src/services/pdf_service.py
-import PyPDF2
+import pypdf
 import io
-import boto3
+import os
+import re
+from boto3.s3.transfer import TransferConfig
 import json
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 
 from shared.exceptions import PDFProcessingError
-from shared.config import Config
+from shared.config import Config, get_aws_client
+from shared.validators import PDFValidator
+from shared.models import Oficio
 
 logger = logging.getLogger(__name__)
 config = Config()
 
+# Separator markers ('separador de oficios' and the long '=' rule are covered
+# by the shorter alternatives)
+_SEPARATOR_RE = re.compile(r'separador|divisor|---|===', re.IGNORECASE)
+
+# Page text extraction is fanned out to threads only for larger documents
+_PARALLEL_EXTRACTION_MIN_PAGES = 8
+_MAX_EXTRACTION_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+# Concurrent oficio uploads; kept within the client's connection pool
+_MAX_UPLOAD_WORKERS = 16
+
+# Large oficios go through a concurrent multipart upload instead of one PUT
+_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+_MULTIPART_CONFIG = TransferConfig(
+    multipart_threshold=_MULTIPART_THRESHOLD,
+    multipart_chunksize=_MULTIPART_THRESHOLD,
+    max_concurrency=8
+)
+
 class PDFService:
     """Service for handling PDF operations"""
     
     def __init__(self):
-        self.s3_client = boto3.client('s3')
+        self.s3_client = get_aws_client('s3')
     
     def download_from_s3(self, bucket: str, key: str) -> bytes:
         """Download PDF content from S3"""
         try:
-            logger.info(f"📥 Downloading PDF from s3://{bucket}/{key}")
+            logger.info("📥 Downloading PDF from s3://%s/%s", bucket, key)
             response = self.s3_client.get_object(Bucket=bucket, Key=key)
+            
+            # Reject oversized objects from the header before buffering the body
+            content_length = response.get('ContentLength', 0)
+            if content_length > PDFValidator.MAX_FILE_SIZE:
+                response['Body'].close()
+                raise PDFProcessingError(
+                    f"PDF too large: {content_length} bytes (max: {PDFValidator.MAX_FILE_SIZE})"
+                )
+            
             content = response['Body'].read()
             
-            logger.info(f"📄 PDF downloaded: {len(content)} bytes")
+            logger.info("📄 PDF downloaded: %s bytes", len(content))
             return content
             
         except Exception as e:
             raise PDFProcessingError(f"Failed to download PDF: {str(e)}")
     
-    def split_into_oficios(self, pdf_content: bytes, batch_id: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def open_pdf(self, pdf_content: bytes) -> pypdf.PdfReader:
+        """Open a PDF once so callers can share the parsed document"""
+        try:
+            return pypdf.PdfReader(io.BytesIO(pdf_content))
+        except Exception as e:
+            raise PDFProcessingError(f"Failed to open PDF: {str(e)}")
+    
+    def split_into_oficios(self, pdf_content: bytes, batch_id: str, metadata: Dict[str, Any],
+                           pdf_reader: Optional[pypdf.PdfReader] = None,
+                           page_texts: Optional[List[str]] = None) -> List[Oficio]:
         """Split PDF into individual oficios"""
         try:
             logger.info("✂️ Starting PDF split into oficios using separator detection")
             
-            # Open PDF document
-            pdf_stream = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_stream)
+            # Open PDF document unless the caller already parsed it
+            if pdf_reader is None:
+                pdf_reader = self.open_pdf(pdf_content)
+            
+            # Extract each page's text once (unless the caller already did);
+            # shared by the separator and config-page checks
+            if page_texts is None:
+                page_texts = self.extract_page_texts(pdf_content, pdf_reader)
             
             # Find separator pages
-            separator_pages = self._find_separator_pages(pdf_reader)
-            logger.info(f"🔍 Found {len(separator_pages)} separator pages")
+            separator_pages = self._find_separator_pages(page_texts)
+            logger.info("🔍 Found %s separator pages", len(separator_pages))
             
             oficios = []
             
@@ -54,60 +101,77 @@ class PDFService:
             else:
                 # Fallback to page-based splitting
                 logger.warning("⚠️ No separators found, falling back to page-based splitting")
-                oficios = self._split_by_pages(pdf_reader, batch_id, metadata)
+                oficios = self._split_by_pages(pdf_reader, page_texts, batch_id, metadata)
             
             # Validate count
             declared_count = metadata.get('cantidad_oficios_declarada', 0)
-            logger.info(f"📊 Validating count - Declared: {declared_count}, Extracted: {len(oficios)}")
+            logger.info("📊 Validating count - Declared: %s, Extracted: %s", declared_count, len(oficios))
             
-            logger.info(f"✅ PDF split completed: {len(oficios)} oficios created")
+            logger.info("✅ PDF split completed: %s oficios created", len(oficios))
             return oficios
             
         except Exception as e:
             raise PDFProcessingError(f"Failed to split PDF: {str(e)}")
     
-    def _find_separator_pages(self, pdf_reader: PyPDF2.PdfReader) -> List[int]:
+    def extract_page_texts(self, pdf_content: bytes, pdf_reader: pypdf.PdfReader) -> List[str]:
+        """Extract the text of every page once, in parallel for larger documents"""
+        total_pages = len(pdf_reader.pages)
+        if total_pages < _PARALLEL_EXTRACTION_MIN_PAGES or _MAX_EXTRACTION_WORKERS < 2:
+            return self._extract_text_range(pdf_reader, 0, total_pages)
+        
+        # A PdfReader seeks its underlying stream lazily, so each worker opens
+        # its own reader over the shared bytes and handles a contiguous range
+        chunk_size = -(-total_pages // _MAX_EXTRACTION_WORKERS)
+        ranges = [(start, min(start + chunk_size, total_pages))
+                  for start in range(0, total_pages, chunk_size)]
+        
+        def extract_range(page_range: Tuple[int, int]) -> List[str]:
+            reader = pypdf.PdfReader(io.BytesIO(pdf_content))
+            return self._extract_text_range(reader, *page_range)
+        
+        page_texts = []
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            for texts in executor.map(extract_range, ranges):
+                page_texts.extend(texts)
+        return page_texts
+    
+    def _extract_text_range(self, pdf_reader: pypdf.PdfReader, start_page: int, end_page: int) -> List[str]:
+        """Extract the text of pages [start_page, end_page)"""
+        page_texts = []
+        for page_num in range(start_page, end_page):
+            try:
+                page_texts.append(pdf_reader.pages[page_num].extract_text() or '')
+            except Exception as e:
+                logger.warning("Error extracting text from page %s: %s", page_num, e)
+                page_texts.append('')
+        return page_texts
+    
+    def _find_separator_pages(self, page_texts: List[str]) -> List[int]:
         """Find pages that act as separators between oficios"""
         try:
             separator_pages = []
             
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text = page.extract_text().lower()
-                
-                # Look for specific separator patterns
-                separator_patterns = [
-                    'separador de oficios',
-                    '=====================',
-                    'separador',
-                    'divisor',
-                    '---',
-                    '==='
-                ]
-                
-                # Check if this page is a separator (not content)
-                is_separator = False
-                for pattern in separator_patterns:
-                    if pattern in text:
-                        # Additional check: separator pages are usually short
-                        if len(text.strip()) < 200:  # Separator pages are typically short
-                            is_separator = True
-                            break
+            for page_num, text in enumerate(page_texts):
+                # Separator pages are typically short; skip content pages
+                # before scanning them for patterns
+                if len(text.strip()) >= 200:
+                    continue
                 
-                if is_separator:
+                if _SEPARATOR_RE.search(text):
                     separator_pages.append(page_num)
             
             return separator_pages
             
         except Exception as e:
-            logger.warning(f"Error finding separators: {str(e)}")
+            logger.warning("Error finding separators: %s", e)
             return []
     
-    def _split_by_separators(self, pdf_reader: PyPDF2.PdfReader, separator_pages: List[int], batch_id: str) -> List[Dict[str, Any]]:
+    def _split_by_separators(self, pdf_reader: pypdf.PdfReader, separator_pages: List[int], batch_id: str) -> List[Oficio]:
         """Split PDF using separator pages"""
         try:
             oficios = []
             oficio_number = 1
+            total_pages = len(pdf_reader.pages)
             
             # Simple approach: create one oficio per separator
             # Each separator marks the end of one oficio and start of the next
@@ -130,9 +194,9 @@ class PDFService:
                     oficio_number += 1
             
             # Add final oficio if there are pages after last separator
-            if separator_pages and separator_pages[-1] + 1 < len(pdf_reader.pages):
+            if separator_pages and separator_pages[-1] + 1 < total_pages:
                 start_page = separator_pages[-1] + 1
-                end_page = len(pdf_reader.pages)
+                end_page = total_pages
                 
                 if end_page > start_page:
                     oficio_data = self._create_oficio_from_pages(
@@ -143,10 +207,10 @@ class PDFService:
             return oficios
             
         except Exception as e:
-            logger.error(f"Error splitting by separators: {str(e)}")
+            logger.error("Error splitting by separators: %s", e)
             return []
     
-    def _split_by_pages(self, pdf_reader: PyPDF2.PdfReader, batch_id: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _split_by_pages(self, pdf_reader: pypdf.PdfReader, page_texts: List[str], batch_id: str, metadata: Dict[str, Any]) -> List[Oficio]:
         """Split PDF by pages (fallback method)"""
         try:
             oficios = []
@@ -154,7 +218,7 @@ class PDFService:
             oficios_per_page = metadata.get('oficios_per_page', 1)
             
             # Skip first page if it contains metadata/config
-            start_page = 1 if self._has_config_page(pdf_reader) else 0
+            start_page = 1 if self._has_config_page(page_texts) else 0
             
             current_page = start_page
             total_pages = len(pdf_reader.pages)
@@ -173,18 +237,19 @@ class PDFService:
             return oficios
             
         except Exception as e:
-            logger.error(f"Error splitting by pages: {str(e)}")
+            logger.error("Error splitting by pages: %s", e)
             return []
     
-    def _create_oficio_from_pages(self, pdf_reader: PyPDF2.PdfReader, start_page: int, end_page: int, batch_id: str, oficio_number: int) -> Dict[str, Any]:
+    def _create_oficio_from_pages(self, pdf_reader: pypdf.PdfReader, start_page: int, end_page: int, batch_id: str, oficio_number: int) -> Oficio:
         """Create an oficio from a range of pages"""
         try:
             # Create new PDF writer
-            pdf_writer = PyPDF2.PdfWriter()
+            pdf_writer = pypdf.PdfWriter()
             
             # Add pages to the writer
+            pages = pdf_reader.pages
             for page_num in range(start_page, end_page):
-                pdf_writer.add_page(pdf_reader.pages[page_num])
+                pdf_writer.add_page(pages[page_num])
             
             # Write to bytes
             output_stream = io.BytesIO()
@@ -192,28 +257,30 @@ class PDFService:
             pdf_content = output_stream.getvalue()
             output_stream.close()
             
-            return {
-                'oficio_id': f"{batch_id}_oficio_{oficio_number:03d}",
-                'batch_id': batch_id,
-                'oficio_number': oficio_number,
-                'page_range': [start_page, end_page - 1],
-                'total_pages': end_page - start_page,
-                'pdf_content': pdf_content,
-                'created_at': datetime.utcnow().isoformat()
-            }
+            return Oficio(
+                oficio_id=f"{batch_id}_oficio_{oficio_number:03d}",
+                batch_id=batch_id,
+                oficio_number=oficio_number,
+                page_range=[start_page, end_page - 1],
+                total_pages=end_page - start_page,
+                pdf_content=pdf_content,
+                created_at=datetime.utcnow().isoformat(),
+                s3_bucket=None,
+                s3_key=None,
+                s3_uri=None
+            )
             
         except Exception as e:
-            logger.error(f"Error creating oficio: {str(e)}")
+            logger.error("Error creating oficio: %s", e)
             raise PDFProcessingError(f"Failed to create oficio: {str(e)}")
     
-    def _has_config_page(self, pdf_reader: PyPDF2.PdfReader) -> bool:
+    def _has_config_page(self, page_texts: List[str]) -> bool:
         """Check if first page contains configuration data"""
         try:
-            if len(pdf_reader.pages) < 2:
+            if len(page_texts) < 2:
                 return False
                 
-            first_page = pdf_reader.pages[0]
-            text = first_page.extract_text().lower()
+            text = page_texts[0].lower()
             
             # Look for configuration keywords
             config_keywords = ['cantidad_oficios', 'empresa', 'configuración', 'lote']
@@ -222,52 +289,60 @@ class PDFService:
         except:
             return False
     
-    def store_oficios_in_s3(self, oficios: List[Dict[str, Any]], batch_id: str) -> List[Dict[str, Any]]:
+    def store_oficios_in_s3(self, oficios: List[Oficio], batch_id: str) -> List[Oficio]:
         """Store individual oficios in S3"""
         try:
-            stored_oficios = []
+            if not oficios:
+                return []
             
-            for oficio in oficios:
-                # Generate S3 key
-                s3_key = f"oficios/lotes/{batch_id}/{oficio['oficio_id']}.pdf"
-                
-                # Upload to S3
-                self.s3_client.put_object(
-                    Bucket=config.S3_BUCKET,
-                    Key=s3_key,
-                    Body=oficio['pdf_content'],
-                    ContentType='application/pdf',
-                    Metadata={
-                        'batch_id': batch_id,
-                        'oficio_id': oficio['oficio_id'],
-                        'oficio_number': str(oficio['oficio_number']),
-                        'total_pages': str(oficio['total_pages'])
-                    }
-                )
-                
-                # Remove PDF content from memory and add S3 reference
-                stored_oficio = {
-                    **oficio,
-                    's3_bucket': config.S3_BUCKET,
-                    's3_key': s3_key,
-                    's3_uri': f"s3://{config.S3_BUCKET}/{s3_key}"
-                }
-                del stored_oficio['pdf_content']  # Remove binary content
-                
-                stored_oficios.append(stored_oficio)
-                
-                logger.info(f"📤 Stored oficio: {oficio['oficio_id']}")
+            # Uploads are latency-bound, so run them concurrently on the shared client
+            with ThreadPoolExecutor(max_workers=min(_MAX_UPLOAD_WORKERS, len(oficios))) as executor:
+                stored_oficios = list(executor.map(
+                    lambda oficio: self._store_oficio(oficio, batch_id), oficios
+                ))
             
-            logger.info(f"✅ All oficios stored in S3: {len(stored_oficios)} files")
+            logger.info("✅ All oficios stored in S3: %s files", len(stored_oficios))
             return stored_oficios
             
         except Exception as e:
             raise PDFProcessingError(f"Failed to store oficios: {str(e)}")
-
-
-
-
-
-
-
-
+    
+    def _store_oficio(self, oficio: Oficio, batch_id: str) -> Oficio:
+        """Upload a single oficio and return it with its S3 reference"""
+        # Generate S3 key
+        s3_key = f"oficios/lotes/{batch_id}/{oficio.oficio_id}.pdf"
+        
+        pdf_content = oficio.pdf_content
+        s3_metadata = {
+            'batch_id': batch_id,
+            'oficio_id': oficio.oficio_id,
+            'oficio_number': str(oficio.oficio_number),
+            'total_pages': str(oficio.total_pages)
+        }
+        
+        # Upload to S3
+        if len(pdf_content) > _MULTIPART_THRESHOLD:
+            self.s3_client.upload_fileobj(
+                io.BytesIO(pdf_content),
+                config.S3_BUCKET,
+                s3_key,
+                ExtraArgs={'ContentType': 'application/pdf', 'Metadata': s3_metadata},
+                Config=_MULTIPART_CONFIG
+            )
+        else:
+            self.s3_client.put_object(
+                Bucket=config.S3_BUCKET,
+                Key=s3_key,
+                Body=pdf_content,
+                ContentType='application/pdf',
+                Metadata=s3_metadata
+            )
+        
+        # Remove PDF content from memory and add S3 reference
+        oficio.s3_bucket = config.S3_BUCKET
+        oficio.s3_key = s3_key
+        oficio.s3_uri = f"s3://{config.S3_BUCKET}/{s3_key}"
+        oficio.pdf_content = None  # Release binary content
+        
+        logger.info("📤 Stored oficio: %s", oficio.oficio_id)
+        return oficio
@@ -6,6 +6,21 @@ from typing import Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
+# Patrones que indican presencia de tabla de personas (case-insensitive,
+# se buscan directamente sobre el texto original)
+_TABLE_INDICATORS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'agente\s+económico',
+    r'empleador',
+    r'n[°º]\s*exp',
+    r'r\.?u\.?c\.?',
+    r'c\.?i\.?p\.?',
+    r'monto\s+b/',
+    r'\|\s*nombre',
+    r'tabla.*persona',
+    r'listado.*cliente',
+    r'\d+-\d+-\d+.*\d+[,\.]\d+',  # Patrón de cédula + monto
+))
+
 class PostOCRValidator:
     """
     Validador post-OCR que verifica si se extrajeron personas
@@ -73,24 +88,9 @@ class PostOCRValidator:
         """
         Detecta si el texto sugiere que debe haber una lista de personas
         """
-        # Patrones que indican presencia de tabla de personas
-        table_indicators = [
-            r'agente\s+económico',
-            r'empleador',
-            r'n[°º]\s*exp',
-            r'r\.?u\.?c\.?',
-            r'c\.?i\.?p\.?',
-            r'monto\s+b/',
-            r'\|\s*nombre',
-            r'tabla.*persona',
-            r'listado.*cliente',
-            r'\d+-\d+-\d+.*\d+[,\.]\d+',  # Patrón de cédula + monto
-        ]
-        
-        text_lower = text.lower()
-        for pattern in table_indicators:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                logger.info(f"✅ Table indicator found: {pattern}")
+        for pattern in _TABLE_INDICATORS:
+            if pattern.search(text):
+                logger.info(f"✅ Table indicator found: {pattern.pattern}")
                 return True
         
         return False
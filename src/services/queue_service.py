@@ -1,68 +1,83 @@
 # src/services/queue_service.py
-import boto3
-import json
 import logging
+import orjson
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
 
-from shared.config import Config
+from shared.config import Config, get_aws_client
+from shared.models import Oficio
 
 logger = logging.getLogger(__name__)
 config = Config()
 
+# SQS accepts at most 10 entries and 256 KiB of total payload per SendMessageBatch call
+SQS_BATCH_SIZE = 10
+SQS_BATCH_MAX_BYTES = 256 * 1024
+SQS_BATCH_MAX_ATTEMPTS = 3
+
+# Independent batch requests are sent concurrently on the shared client
+SQS_MAX_CONCURRENT_BATCHES = 8
+
 class QueueService:
     """Service for managing SQS operations"""
     
     def __init__(self):
-        self.sqs_client = boto3.client('sqs')
+        self.sqs_client = get_aws_client('sqs')
     
-    def send_oficios_to_processing(self, oficios: List[Dict[str, Any]], 
+    def send_oficios_to_processing(self, oficios: List[Oficio], 
                                  batch_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Send oficios to OCR processing queue"""
         try:
-            logger.info(f"📤 Sending {len(oficios)} oficios to processing queue")
+            logger.info("📤 Sending %s oficios to processing queue", len(oficios))
             
             sent_count = 0
             failed_count = 0
+            created_at = datetime.utcnow().isoformat()
+            entries = []
             
-            for oficio in oficios:
-                try:
-                    # Create message for SQS
-                    message_data = {
-                        'job_id': oficio['oficio_id'],
-                        'batch_id': batch_id,
-                        'oficio_data': oficio,
-                        'batch_metadata': metadata,
-                        'created_at': datetime.utcnow().isoformat(),
-                        'source': 's3_direct'
-                    }
-                    
-                    # Send to SQS
-                    response = self.sqs_client.send_message(
-                        QueueUrl=config.OCR_QUEUE_URL,
-                        MessageBody=json.dumps(message_data, ensure_ascii=False),
-                        MessageAttributes={
-                            'BatchId': {
-                                'StringValue': batch_id,
-                                'DataType': 'String'
-                            },
-                            'OficioId': {
-                                'StringValue': oficio['oficio_id'],
-                                'DataType': 'String'
-                            },
-                            'Source': {
-                                'StringValue': 's3_direct',
-                                'DataType': 'String'
-                            }
+            # Attributes shared by every message of the batch
+            base_attributes = {
+                'BatchId': {
+                    'StringValue': batch_id,
+                    'DataType': 'String'
+                },
+                'Source': {
+                    'StringValue': 's3_direct',
+                    'DataType': 'String'
+                }
+            }
+            
+            for index, oficio in enumerate(oficios):
+                # Create message for SQS
+                message_data = {
+                    'job_id': oficio.oficio_id,
+                    'batch_id': batch_id,
+                    'oficio_data': oficio.to_dict(),
+                    'batch_metadata': metadata,
+                    'created_at': created_at,
+                    'source': 's3_direct'
+                }
+                
+                entries.append({
+                    'Id': str(index),
+                    'MessageBody': orjson.dumps(message_data).decode('utf-8'),
+                    'MessageAttributes': {
+                        **base_attributes,
+                        'OficioId': {
+                            'StringValue': oficio.oficio_id,
+                            'DataType': 'String'
                         }
-                    )
-                    
-                    sent_count += 1
-                    logger.debug(f"📤 Sent: {oficio['oficio_id']}")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Failed to send {oficio['oficio_id']}: {str(e)}")
-                    failed_count += 1
+                    }
+                })
+            
+            batches = self._pack_batches(entries)
+            if batches:
+                with ThreadPoolExecutor(max_workers=min(SQS_MAX_CONCURRENT_BATCHES, len(batches))) as executor:
+                    for sent, failed in executor.map(self._send_batch_with_retry, batches):
+                        sent_count += sent
+                        failed_count += failed
             
             result = {
                 'sent_count': sent_count,
@@ -71,9 +86,72 @@ class QueueService:
                 'success_rate': sent_count / len(oficios) if oficios else 0
             }
             
-            logger.info(f"📊 Queue result: {result}")
+            logger.info("📊 Queue result: %s", result)
             return result
             
         except Exception as e:
-            logger.error(f"❌ Error sending to queue: {str(e)}")
-            raise
\ No newline at end of file
+            logger.error("❌ Error sending to queue: %s", e)
+            raise
+    
+    def _pack_batches(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Dict[str, Any]]]:
+        """Group entries into SendMessageBatch requests bounded by count and payload size"""
+        batches = []
+        current = {}
+        current_size = 0
+        
+        for entry in entries:
+            entry_size = self._entry_size(entry)
+            if current and (len(current) == SQS_BATCH_SIZE or current_size + entry_size > SQS_BATCH_MAX_BYTES):
+                batches.append(current)
+                current = {}
+                current_size = 0
+            current[entry['Id']] = entry
+            current_size += entry_size
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    @staticmethod
+    def _entry_size(entry: Dict[str, Any]) -> int:
+        """Payload bytes SQS counts for an entry: body plus attribute names, types and values"""
+        size = len(entry['MessageBody'].encode('utf-8'))
+        for name, attribute in entry['MessageAttributes'].items():
+            size += len(name) + len(attribute['DataType']) + len(attribute['StringValue'].encode('utf-8'))
+        return size
+    
+    def _send_batch_with_retry(self, entries: Dict[str, Dict[str, Any]]) -> Tuple[int, int]:
+        """Send up to 10 entries, retrying retryable failures with exponential backoff"""
+        sent_count = 0
+        pending = entries
+        
+        for attempt in range(SQS_BATCH_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(0.1 * (2 ** attempt))
+            
+            try:
+                response = self.sqs_client.send_message_batch(
+                    QueueUrl=config.OCR_QUEUE_URL,
+                    Entries=list(pending.values())
+                )
+            except Exception as e:
+                logger.error("❌ Failed to send batch of %s messages: %s", len(pending), e)
+                continue
+            
+            sent_count += len(response.get('Successful', []))
+            
+            retry = {}
+            for failure in response.get('Failed', []):
+                entry = pending[failure['Id']]
+                oficio_id = entry['MessageAttributes']['OficioId']['StringValue']
+                logger.error("❌ Failed to send %s: %s %s", oficio_id, failure.get('Code'), failure.get('Message', ''))
+                
+                # Sender faults (malformed entry, oversized body) will not succeed on retry
+                if not failure.get('SenderFault'):
+                    retry[failure['Id']] = entry
+            
+            if not retry:
+                return sent_count, len(entries) - sent_count
+            pending = retry
+        
+        return sent_count, len(entries) - sent_count
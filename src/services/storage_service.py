@@ -1,21 +1,41 @@
 # src/services/storage_service.py
-import boto3
-import json
+import gzip
+import hashlib
+import orjson
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
-from shared.config import Config
+from shared.config import Config, get_aws_client
 from shared.exceptions import OCRBaseException
 
 logger = logging.getLogger(__name__)
 config = Config()
 
+# OCR outputs keyed by OCR version (configured model + annotation schema
+# hash) and PDF fingerprint (SHA-256 of the content, or S3 ETag); the bucket
+# is expected to expire this prefix with a lifecycle rule (see README)
+OCR_CACHE_PREFIX = 'ocr-cache'
+
+# Read size when streaming PDFs out of S3
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# JSON objects are stored gzip-compressed (ContentEncoding: gzip); a low level
+# already shrinks OCR JSON several times at negligible CPU cost
+JSON_GZIP_LEVEL = 3
+
+def read_json_object(response: Dict[str, Any]) -> Any:
+    """Parse a get_object response, gzip-compressed or not (older objects)"""
+    content = response['Body'].read()
+    if response.get('ContentEncoding') == 'gzip':
+        content = gzip.decompress(content)
+    return orjson.loads(content)
+
 class StorageService:
     """Service for handling S3 storage operations"""
     
     def __init__(self):
-        self.s3_client = boto3.client('s3')
+        self.s3_client = get_aws_client('s3')
         self.bucket = config.S3_BUCKET
     
     def download_oficio_pdf(self, oficio_data: Dict[str, Any]) -> bytes:
@@ -36,17 +56,90 @@ class StorageService:
         except Exception as e:
             raise OCRBaseException(f"Failed to download oficio PDF: {str(e)}")
     
+    def download_oficio_pdf_with_digest(self, oficio_data: Dict[str, Any]) -> Tuple[bytearray, str]:
+        """Download oficio PDF from S3, hashing it (SHA-256) while the body streams in"""
+        try:
+            s3_key = oficio_data.get('s3_key')
+            if not s3_key:
+                raise OCRBaseException("No S3 key found in oficio data")
+            
+            logger.info(f"📥 Downloading oficio PDF: {s3_key}")
+            
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=s3_key)
+            content = bytearray()
+            digest = hashlib.sha256()
+            for chunk in response['Body'].iter_chunks(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                content += chunk
+                digest.update(chunk)
+            
+            logger.info(f"✅ Downloaded {len(content)} bytes")
+            return content, digest.hexdigest()
+            
+        except Exception as e:
+            raise OCRBaseException(f"Failed to download oficio PDF: {str(e)}")
+    
+    def presign_oficio_pdf(self, oficio_data: Dict[str, Any], expires_in: int = 900) -> str:
+        """Presigned GET URL for an oficio PDF, so a remote service can fetch it directly"""
+        try:
+            s3_key = oficio_data.get('s3_key')
+            if not s3_key:
+                raise OCRBaseException("No S3 key found in oficio data")
+            
+            return self.s3_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket, 'Key': s3_key},
+                ExpiresIn=expires_in
+            )
+            
+        except Exception as e:
+            raise OCRBaseException(f"Failed to presign oficio PDF: {str(e)}")
+    
+    def get_oficio_pdf_etag(self, oficio_data: Dict[str, Any]) -> Optional[str]:
+        """ETag of an oficio PDF, used to fingerprint PDFs that are never downloaded"""
+        try:
+            s3_key = oficio_data.get('s3_key')
+            if not s3_key:
+                return None
+            
+            response = self.s3_client.head_object(Bucket=self.bucket, Key=s3_key)
+            return response['ETag'].strip('"')
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read ETag for oficio PDF: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _job_pdf_keys(job_id: str):
+        """Common key patterns for job PDFs, in lookup order"""
+        return (
+            f"jobs/{job_id}/input.pdf",
+            f"jobs/{job_id}.pdf",
+            f"oficios/{job_id}.pdf"
+        )
+    
+    def locate_job_pdf(self, job_id: str) -> Dict[str, Any]:
+        """Find a job PDF without downloading it; returns its s3_key and etag"""
+        try:
+            for key in self._job_pdf_keys(job_id):
+                try:
+                    response = self.s3_client.head_object(Bucket=self.bucket, Key=key)
+                    return {'s3_key': key, 'etag': response['ETag'].strip('"')}
+                except self.s3_client.exceptions.ClientError as e:
+                    if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+                        raise
+            
+            raise OCRBaseException(f"No PDF found for job {job_id}")
+            
+        except OCRBaseException:
+            raise
+        except Exception as e:
+            raise OCRBaseException(f"Failed to locate job PDF: {str(e)}")
+    
     def download_job_pdf(self, job_id: str) -> bytes:
         """Download job PDF for individual processing"""
         try:
             # Try common patterns for job PDFs
-            possible_keys = [
-                f"jobs/{job_id}/input.pdf",
-                f"jobs/{job_id}.pdf",
-                f"oficios/{job_id}.pdf"
-            ]
-            
-            for key in possible_keys:
+            for key in self._job_pdf_keys(job_id):
                 try:
                     logger.info(f"📥 Trying to download: {key}")
                     response = self.s3_client.get_object(Bucket=self.bucket, Key=key)
@@ -68,23 +161,27 @@ class StorageService:
             s3_key = f"jobs/{job_id}/result.json"
             
             # Add metadata
+            saved_at = datetime.utcnow().isoformat()
             result_with_metadata = {
                 **result_data,
                 'job_id': job_id,
-                'saved_at': datetime.utcnow().isoformat(),
+                'saved_at': saved_at,
                 'version': '2.0'
             }
             
-            # Save to S3
+            # Save to S3; orjson emits compact UTF-8 bytes directly, so they go
+            # straight to gzip without a str round-trip
             self.s3_client.put_object(
                 Bucket=self.bucket,
                 Key=s3_key,
-                Body=json.dumps(result_with_metadata, ensure_ascii=False, indent=2),
+                Body=gzip.compress(orjson.dumps(result_with_metadata, default=str),
+                                   compresslevel=JSON_GZIP_LEVEL),
                 ContentType='application/json',
+                ContentEncoding='gzip',
                 Metadata={
                     'job_id': job_id,
                     'result_type': 'ocr_analysis',
-                    'saved_at': datetime.utcnow().isoformat()
+                    'saved_at': saved_at
                 }
             )
             
@@ -94,15 +191,51 @@ class StorageService:
         except Exception as e:
             raise OCRBaseException(f"Failed to save OCR result: {str(e)}")
     
+    def get_cached_ocr(self, version: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the cached OCR output of a PDF by OCR version and content fingerprint
+        
+        Entries older than OCR_CACHE_TTL_DAYS count as a miss, so they are
+        re-extracted and overwritten.
+        """
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket,
+                Key=f"{OCR_CACHE_PREFIX}/{version}/{fingerprint}.json"
+            )
+            last_modified = response.get('LastModified')
+            if last_modified and last_modified < datetime.now(timezone.utc) - timedelta(days=config.OCR_CACHE_TTL_DAYS):
+                response['Body'].close()
+                return None
+            return read_json_object(response)
+            
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to read OCR cache {fingerprint}: {str(e)}")
+            return None
+    
+    def put_cached_ocr(self, version: str, fingerprint: str, body: bytes) -> None:
+        """Store the serialized OCR output of a PDF under its version and content fingerprint"""
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=f"{OCR_CACHE_PREFIX}/{version}/{fingerprint}.json",
+                Body=gzip.compress(body, compresslevel=JSON_GZIP_LEVEL),
+                ContentType='application/json',
+                ContentEncoding='gzip'
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to write OCR cache {fingerprint}: {str(e)}")
+    
     def load_ocr_result(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Load OCR result from S3"""
         try:
             s3_key = f"jobs/{job_id}/result.json"
             
             response = self.s3_client.get_object(Bucket=self.bucket, Key=s3_key)
-            content = response['Body'].read()
             
-            result = json.loads(content)
+            result = read_json_object(response)
             logger.info(f"📄 Loaded OCR result for job {job_id}")
             return result
             
@@ -1,11 +1,10 @@
 # src/services/tracking_service.py
-import boto3
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from boto3.dynamodb.conditions import Key
 
-from shared.config import Config
+from shared.config import Config, get_dynamodb_table
 from shared.exceptions import OCRBaseException
 
 logger = logging.getLogger(__name__)
@@ -15,30 +14,49 @@ class TrackingService:
     """Service for tracking jobs and batches in DynamoDB"""
     
     def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb')
-        self.batch_table = self.dynamodb.Table(config.BATCH_TRACKING_TABLE)
-        self.job_table = self.dynamodb.Table(config.JOB_TRACKING_TABLE)
+        self.batch_table_name = config.BATCH_TRACKING_TABLE
+        self.job_table_name = config.JOB_TRACKING_TABLE
     
-    def update_job_status(self, job_id: str, status: str, message: Optional[str] = None) -> None:
-        """Update job status in DynamoDB"""
+    # Tables are resolved against the calling thread's resource (and cached
+    # there), so one service instance can be shared by the OCR processor's
+    # worker threads
+    @property
+    def batch_table(self):
+        return get_dynamodb_table(self.batch_table_name)
+    
+    @property
+    def job_table(self):
+        return get_dynamodb_table(self.job_table_name)
+    
+    def update_job_status(self, job_id: str, status: str, message: Optional[str] = None,
+                          history: Optional[List[Tuple[str, str]]] = None) -> None:
+        """
+        Update job status in DynamoDB
+        
+        history: (status, message) stages to append to the job's status_history
+        in the same UpdateItem, for callers that only write the final status
+        """
         try:
+            # One timestamp for updated_at and completed_at / error_at
+            now_iso = datetime.utcnow().isoformat()
             update_data = {
                 'status': status,
-                'updated_at': datetime.utcnow().isoformat()
+                'updated_at': now_iso
             }
             
+            # Limitar longitud del mensaje para evitar ValidationException
+            # DynamoDB tiene límites en el tamaño de ExpressionAttributeValues
+            max_message_length = 1000  # Límite conservador
+            
             if message:
-                # Limitar longitud del mensaje para evitar ValidationException
-                # DynamoDB tiene límites en el tamaño de ExpressionAttributeValues
-                max_message_length = 1000  # Límite conservador
                 if len(message) > max_message_length:
                     message = message[:max_message_length-3] + "..."
                 update_data['status_message'] = message
             
             if status == 'completed':
-                update_data['completed_at'] = datetime.utcnow().isoformat()
+                update_data['completed_at'] = now_iso
             elif status == 'error':
-                update_data['error_at'] = datetime.utcnow().isoformat()
+                update_data['error_at'] = now_iso
             
             # Build update expression
             update_expr = 'SET #status = :status, updated_at = :updated'
@@ -60,6 +78,14 @@ class TrackingService:
                 update_expr += ', error_at = :error_time'
                 expr_values[':error_time'] = update_data['error_at']
             
+            if history:
+                update_expr += ', status_history = list_append(if_not_exists(status_history, :empty_list), :history)'
+                expr_values[':empty_list'] = []
+                expr_values[':history'] = [
+                    {'status': stage, 'message': (stage_message or '')[:max_message_length]}
+                    for stage, stage_message in history
+                ]
+            
             self.job_table.update_item(
                 Key={'job_id': job_id},
                 UpdateExpression=update_expr,
@@ -91,7 +117,12 @@ class TrackingService:
             return None
     
     def update_batch_progress(self, batch_id: str) -> None:
-        """Update batch progress based on job statuses"""
+        """
+        Update batch progress based on job statuses
+        
+        Sole writer of the batch counters (OCR processor and CRM integrator):
+        they are recomputed from the job rows, never incremented
+        """
         try:
             # Get all jobs for this batch
             response = self.job_table.query(
@@ -106,8 +137,14 @@ class TrackingService:
             # Calculate statistics
             total_jobs = len(jobs)
             completed_jobs = len([j for j in jobs if j.get('status') == 'completed'])
-            error_jobs = len([j for j in jobs if j.get('status') == 'error'])
-            processing_jobs = len([j for j in jobs if j.get('status') in ['processing', 'ocr_processing']])
+            # crm_error is terminal too: the CRM integrator gives up on the job
+            error_jobs = len([j for j in jobs if j.get('status') in ('error', 'crm_error')])
+            
+            # The 'ocr_processing' start write is optional (VERBOSE_TRACKING), so
+            # once any job has left 'queued' every non-terminal job (queued,
+            # ocr_processing, ocr_completed...) counts as in progress
+            started = any(j.get('status') != 'queued' for j in jobs)
+            processing_jobs = total_jobs - completed_jobs - error_jobs if started else 0
             
             # Determine batch status
             if completed_jobs == total_jobs:
@@ -116,9 +153,9 @@ class TrackingService:
             elif error_jobs > 0 and (completed_jobs + error_jobs) == total_jobs:
                 batch_status = 'partial_completion'
                 status_message = f'{completed_jobs} completed, {error_jobs} failed'
-            elif processing_jobs > 0:
+            elif started:
                 batch_status = 'processing'
-                status_message = f'{completed_jobs}/{total_jobs} completed, {processing_jobs} processing'
+                status_message = f'{completed_jobs}/{total_jobs} completed, {processing_jobs} in progress'
             else:
                 batch_status = 'queued'
                 status_message = f'{total_jobs} oficios queued for processing'
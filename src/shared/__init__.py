@@ -3,13 +3,14 @@
 Shared modules for OCR SAM Project v2.0
 
 This package contains shared utilities, configuration, and common functionality:
-- Config: Centralized configuration management
+- Config: Centralized configuration management (plus shared boto3 client settings)
 - Exceptions: Custom exception classes
 - Utils: Utility classes for logging, formatting, and text processing
 - Validators: Validation classes for PDFs, metadata, and oficios
+- Models: Lightweight data records (Oficio) with no PDF dependency
 """
 
-from .config import Config
+from .config import Config, AWS_CLIENT_CONFIG, get_aws_client, get_aws_resource, get_dynamodb_table
 from .exceptions import (
     OCRBaseException,
     PDFProcessingError,
@@ -22,11 +23,16 @@ from .exceptions import (
     StorageError,
     TrackingError
 )
-from .utils import ResponseFormatter, Logger, TextCleaner
+from .utils import ResponseFormatter, Logger, TextCleaner, RateLimiter
 from .validators import PDFValidator, OficiosValidator, MetadataValidator, ValidationResult
+from .models import Oficio
 
 __all__ = [
     'Config',
+    'AWS_CLIENT_CONFIG',
+    'get_aws_client',
+    'get_aws_resource',
+    'get_dynamodb_table',
     'OCRBaseException',
     'PDFProcessingError',
     'ValidationError',
@@ -40,10 +46,12 @@ __all__ = [
     'ResponseFormatter',
     'Logger',
     'TextCleaner',
+    'RateLimiter',
     'PDFValidator',
     'OficiosValidator',
     'MetadataValidator',
-    'ValidationResult'
+    'ValidationResult',
+    'Oficio'
 ]
 
 __version__ = '2.0.0'
@@ -1,6 +1,59 @@
 # src/shared/config.py
 import os
+import functools
+import threading
 from typing import Optional
+import boto3
+from botocore.config import Config as BotoConfig
+
+# Shared botocore settings for data-plane clients: a connection pool large
+# enough for the concurrent S3/SQS fan-out, TCP keepalive on pooled
+# connections, adaptive retries that back off on throttling, and timeouts
+# short enough that a stalled connection is retried instead of hanging for
+# botocore's 60s default
+AWS_CLIENT_CONFIG = BotoConfig(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=30,
+    retries={'max_attempts': 10, 'mode': 'adaptive'}
+)
+
+# Creating clients from the shared default session is not thread-safe, and
+# clients may be first requested from worker threads
+_client_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def get_aws_client(service_name: str):
+    """Return the process-wide boto3 client for a service (built once per container)"""
+    with _client_lock:
+        return boto3.client(service_name, config=AWS_CLIENT_CONFIG)
+
+_thread_resources = threading.local()
+
+def get_aws_resource(service_name: str):
+    """Return this thread's boto3 resource for a service (built once per thread)"""
+    # Unlike clients, boto3 resources are not thread-safe, so worker threads
+    # get their own resource on a private session instead of sharing one
+    cache = getattr(_thread_resources, 'cache', None)
+    if cache is None:
+        cache = _thread_resources.cache = {}
+    resource = cache.get(service_name)
+    if resource is None:
+        resource = cache[service_name] = boto3.session.Session().resource(
+            service_name, config=AWS_CLIENT_CONFIG
+        )
+    return resource
+
+def get_dynamodb_table(table_name: str):
+    """Return this thread's DynamoDB Table handle (built once per thread)"""
+    tables = getattr(_thread_resources, 'tables', None)
+    if tables is None:
+        tables = _thread_resources.tables = {}
+    table = tables.get(table_name)
+    if table is None:
+        table = tables[table_name] = get_aws_resource('dynamodb').Table(table_name)
+    return table
 
 class Config:
     """Centralized configuration management"""
@@ -13,6 +66,20 @@ class Config:
         self.BATCH_TRACKING_TABLE = os.getenv('BATCH_TRACKING_TABLE', 'OCRBatchTracking')
         self.JOB_TRACKING_TABLE = os.getenv('JOB_TRACKING_TABLE', 'OCRJobTracking')
         self.MISTRAL_API_KEY = os.getenv('MISTRAL_API_KEY')
+        # Modelo OCR; 'mistral-ocr-latest' es un alias que Mistral mueve, fijar
+        # una versión con fecha para que la caché OCR cambie con el modelo
+        self.MISTRAL_OCR_MODEL = os.getenv('MISTRAL_OCR_MODEL', 'mistral-ocr-latest')
+        self.MISTRAL_MAX_REQUESTS_PER_SECOND = float(os.getenv('MISTRAL_MAX_REQUESTS_PER_SECOND', '5'))
+        # 'presigned_url': Mistral fetches oficio PDFs from S3 itself;
+        # 'inline': the Lambda downloads them and sends them base64-encoded
+        self.OCR_DOCUMENT_SOURCE = os.getenv('OCR_DOCUMENT_SOURCE', 'presigned_url')
+        # Reuse the OCR output of identical PDFs (reprocessing, SQS redrives)
+        self.OCR_RESULT_CACHE_ENABLED = os.getenv('OCR_RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+        # Cached OCR output older than this is ignored and re-extracted
+        self.OCR_CACHE_TTL_DAYS = int(os.getenv('OCR_CACHE_TTL_DAYS', '30'))
+        # Also write the intermediate 'ocr_processing' job status (one extra
+        # DynamoDB round-trip per job); otherwise it is only kept in the history
+        self.VERBOSE_TRACKING = os.getenv('VERBOSE_TRACKING', 'false').lower() == 'true'
         self.CREATIO_URL = os.getenv('CREATIO_URL')
         self.CREATIO_USERNAME = os.getenv('CREATIO_USERNAME')
         self.CREATIO_PASSWORD = os.getenv('CREATIO_PASSWORD')
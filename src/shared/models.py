@@ -0,0 +1,41 @@
+# src/shared/models.py
+"""
+Lightweight data models shared across Lambdas
+
+Kept free of PDF and AWS dependencies so that services which only pass the
+records around (batch tracking, queueing) do not import pypdf at cold start.
+"""
+
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+@dataclass
+class Oficio:
+    """Individual oficio split from a batch PDF"""
+    # Explicit __slots__ (dataclass(slots=True) needs Python 3.10+)
+    __slots__ = ('oficio_id', 'batch_id', 'oficio_number', 'page_range', 'total_pages',
+                 'pdf_content', 'created_at', 's3_bucket', 's3_key', 's3_uri')
+    oficio_id: str
+    batch_id: str
+    oficio_number: int
+    page_range: List[int]
+    total_pages: int
+    pdf_content: Optional[bytes]
+    created_at: str
+    s3_bucket: Optional[str]
+    s3_key: Optional[str]
+    s3_uri: Optional[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the stored oficio for SQS/DynamoDB (binary content excluded)"""
+        return {
+            'oficio_id': self.oficio_id,
+            'batch_id': self.batch_id,
+            'oficio_number': self.oficio_number,
+            'page_range': self.page_range,
+            'total_pages': self.total_pages,
+            'created_at': self.created_at,
+            's3_bucket': self.s3_bucket,
+            's3_key': self.s3_key,
+            's3_uri': self.s3_uri
+        }
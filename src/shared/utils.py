@@ -1,7 +1,10 @@
 # src/shared/utils.py
-import json
 import logging
+import orjson
+import os
 import re
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 
@@ -13,7 +16,7 @@ class ResponseFormatter:
         """Format successful response"""
         return {
             'statusCode': status_code,
-            'body': json.dumps(data, ensure_ascii=False, default=str)
+            'body': orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
         }
     
     @staticmethod
@@ -21,10 +24,10 @@ class ResponseFormatter:
         """Format error response"""
         return {
             'statusCode': status_code,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': error_message,
                 'timestamp': datetime.utcnow().isoformat()
-            }, ensure_ascii=False)
+            }).decode('utf-8')
         }
 
 class Logger:
@@ -34,16 +37,20 @@ class Logger:
     def setup_logger(name: str) -> logging.Logger:
         """Setup logger with consistent configuration"""
         logger = logging.getLogger(name)
-        logger.setLevel(logging.INFO)
+        logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
         return logger
     
     @staticmethod
-    def log_success(logger: logging.Logger, message: str, data: Dict[str, Any] = None):
-        """Log success message with optional data"""
+    def log_success(logger: logging.Logger, message: str, data: Dict[str, Any] = None,
+                    level: int = logging.INFO):
+        """Log success message with optional data (serialized only if emitted)"""
+        if not logger.isEnabledFor(level):
+            return
         if data:
-            logger.info(f"✅ {message} - {json.dumps(data, default=str)}")
+            logger.log(level, "✅ %s - %s", message,
+                       orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8'))
         else:
-            logger.info(f"✅ {message}")
+            logger.log(level, "✅ %s", message)
     
     @staticmethod
     def log_error(logger: logging.Logger, message: str, error: Exception = None):
@@ -54,12 +61,16 @@ class Logger:
             logger.error(f"❌ {message}")
     
     @staticmethod
-    def log_processing_step(logger: logging.Logger, message: str, data: Dict[str, Any] = None):
-        """Log processing step with optional data"""
+    def log_processing_step(logger: logging.Logger, message: str, data: Dict[str, Any] = None,
+                            level: int = logging.INFO):
+        """Log processing step with optional data (serialized only if emitted)"""
+        if not logger.isEnabledFor(level):
+            return
         if data:
-            logger.info(f"🔄 {message} - {json.dumps(data, default=str)}")
+            logger.log(level, "🔄 %s - %s", message,
+                       orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8'))
         else:
-            logger.info(f"🔄 {message}")
+            logger.log(level, "🔄 %s", message)
 
 class TextCleaner:
     """Utility class for text cleaning operations"""
@@ -148,4 +159,32 @@ class TextCleaner:
             if matches:
                 return matches[0]
         
-        return None
\ No newline at end of file
+        return None
+
+class RateLimiter:
+    """Thread-safe token bucket that paces calls to an external API"""
+    
+    def __init__(self, rate_per_second: float, burst: Optional[int] = None):
+        self.rate = rate_per_second
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_second)))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it"""
+        if self.rate <= 0:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            
+            # Reserve the token now (the balance may go negative) and sleep
+            # outside the lock for the deficit, so waiters queue up in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        
+        if wait > 0:
+            time.sleep(wait)
@@ -34,8 +34,9 @@ class PDFValidator:
             if not pdf_content.startswith(b'%PDF-'):
                 return ValidationResult(False, "Invalid PDF file: missing PDF header")
             
-            # Basic PDF structure check
-            if b'%%EOF' not in pdf_content:
+            # Basic PDF structure check; the EOF marker lives in the trailer,
+            # so search backwards from the end instead of scanning the whole file
+            if pdf_content.rfind(b'%%EOF') == -1:
                 return ValidationResult(False, "Invalid PDF file: missing EOF marker")
             
             return ValidationResult(True)